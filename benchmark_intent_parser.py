@@ -0,0 +1,102 @@
+# File: benchmark_intent_parser.py
+"""
+Compara el análisis de consultas y mensajes de intent_parser con las búsquedas lineales
+que hacían searchInDatabase y respond_to_message.
+
+Uso: python benchmark_intent_parser.py [repeticiones]
+"""
+import sys
+import time
+
+from intent_parser import (CATEGORIAS, PRECIO_REGEX, PALABRAS_COMUNES, START_COMMANDS, EXIT_COMMANDS,
+                           BOT_MARKERS, parse_product_query, classify_message)
+
+QUERIES = [
+    "laptop lenovo thinkpad",
+    "laptop de 1500 soles",
+    "monitor samsung 24 pulgadas",
+    "impresora epson menos de 800",
+    "quiero un celular o smartphone con buena cámara de más de 2000",
+    "audífonos bluetooth baratos bajo 150",
+    "entre 100 y 300",
+    "hola",
+    "✨ ¡Bienvenido al asistente de ventas! Elige una opción del menú",
+    "Necesito un router y un disco externo usb para la oficina, algo económico",
+]
+
+PALABRAS_COMUNES_LISTA = list(PALABRAS_COMUNES)
+EXIT_COMMANDS_LISTA = list(EXIT_COMMANDS)
+
+
+def legacy_parse_product_query(query):
+    """parse_product_query tal como estaba en product_search.py"""
+    query_lower = query.lower()
+
+    min_precio = None
+    max_precio = None
+    match_precio = PRECIO_REGEX.search(query_lower)
+
+    if match_precio:
+        precio1 = int(match_precio.group(1))
+        precio2 = int(match_precio.group(2)) if match_precio.group(2) else None
+
+        if precio1 is not None and precio2 is not None:
+            min_precio = min(precio1, precio2)
+            max_precio = max(precio1, precio2)
+        elif precio1 is not None:
+            pre_context = query_lower[max(0, match_precio.start() - 15):match_precio.start()]
+            if "menos" in pre_context or "bajo" in pre_context or "económico" in pre_context or "barato" in pre_context or "menos de" in query_lower or "máximo" in query_lower:
+                max_precio = precio1
+            elif "más" in pre_context or "encima" in pre_context or "mayor" in pre_context or "mínimo" in pre_context or "más de" in query_lower or "mínimo" in query_lower:
+                min_precio = precio1
+            else:
+                min_precio = max(0, precio1 - round(precio1 * 0.1))
+                max_precio = precio1 + round(precio1 * 0.1)
+
+    palabras_clave = [word.replace(r'[^\wáéíóúñ]', '').strip() for word in query_lower.split()]
+    palabras_clave = [word for word in palabras_clave if len(word) > 2 and word not in PALABRAS_COMUNES_LISTA]
+
+    categorias_mencionadas = [cat for cat in CATEGORIAS if cat in query_lower or any(cat in palabra for palabra in palabras_clave)]
+
+    return {
+        "palabras_clave": palabras_clave,
+        "categorias": categorias_mencionadas,
+        "min_precio": min_precio,
+        "max_precio": max_precio
+    }
+
+
+def legacy_classify_message(message_text):
+    """Comprobaciones de respond_to_message y handle_menu_options tal como estaban en main.py"""
+    return {
+        "bot_echo": any(identifier in message_text.lower() for identifier in BOT_MARKERS),
+        "start": any(cmd in message_text.lower() for cmd in START_COMMANDS),
+        "exit": message_text.lower() in EXIT_COMMANDS_LISTA
+    }
+
+
+def time_calls(function, repeat):
+    """Tiempo medio por llamada en microsegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            function(query)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(QUERIES))
+
+
+def run_benchmark(repeat):
+    print(f"📊 {len(QUERIES)} textos, {repeat} repeticiones")
+    for label, legacy, compiled in (("parse_product_query", legacy_parse_product_query, parse_product_query),
+                                    ("classify_message", legacy_classify_message, classify_message)):
+        legacy_us = time_calls(legacy, repeat)
+        compiled_us = time_calls(compiled, repeat)
+        mismatches = [query for query in QUERIES if legacy(query) != compiled(query)]
+        print(f"- {label}:")
+        print(f"    búsquedas lineales: {legacy_us:8.2f} µs/llamada")
+        print(f"    intent_parser:      {compiled_us:8.2f} µs/llamada (x{legacy_us / compiled_us:.1f})")
+        print(f"    resultados idénticos: {'sí' if not mismatches else 'no: ' + ', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run_benchmark(repeat)
@@ -0,0 +1,55 @@
+# File: benchmark_product_search.py
+"""
+Compara la búsqueda de productos con y sin sentencias preparadas usando EXPLAIN ANALYZE.
+
+Uso: python benchmark_product_search.py [repeticiones]
+
+Muestra por separado el tiempo de planificación y el de ejecución de cada forma de
+consulta. Con sentencias preparadas PostgreSQL planifica las 5 primeras ejecuciones
+con los valores concretos y después puede pasar a un plan genérico sin planificación.
+"""
+import sys
+
+from db_pool import db_pool
+from prepared_statements import statement_registry
+from product_search import PRODUCT_PAGE_SIZE, PRODUCT_SEARCH_BACKEND, parse_product_query, build_tiered_query
+
+QUERIES = [
+    "laptop lenovo thinkpad",
+    "laptop de 1500 soles",
+    "monitor samsung 24 pulgadas",
+    "impresora epson menos de 800",
+    "mouse gamer",
+    "entre 100 y 300",
+]
+
+
+def average_timings(cur, sql, params, repeat, prepared):
+    totals = {"planning_ms": 0.0, "execution_ms": 0.0}
+    for _ in range(repeat):
+        timings = statement_registry.explain(cur, sql, params, prepared=prepared)
+        for key in totals:
+            totals[key] += timings[key]
+    return {key: value / repeat for key, value in totals.items()}
+
+
+def run_benchmark(repeat):
+    print(f"📊 Backend '{PRODUCT_SEARCH_BACKEND}', {repeat} repeticiones por consulta")
+    with db_pool.connection() as conn, conn.cursor() as cur:
+        for query in QUERIES:
+            sql, params = build_tiered_query(parse_product_query(query), PRODUCT_SEARCH_BACKEND, PRODUCT_PAGE_SIZE)
+            plain = average_timings(cur, sql, params, repeat, prepared=False)
+            prepared = average_timings(cur, sql, params, repeat, prepared=True)
+            print(f"- {query!r}")
+            print(f"    normal:    planificación {plain['planning_ms']:7.3f} ms, ejecución {plain['execution_ms']:7.3f} ms")
+            print(f"    preparada: planificación {prepared['planning_ms']:7.3f} ms, ejecución {prepared['execution_ms']:7.3f} ms")
+    print(f"📈 Sentencias preparadas: {statement_registry.stats()}")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    try:
+        run_benchmark(repeat)
+    except Exception as e:
+        print(f"❌ No se pudo ejecutar el benchmark: {e}")
+        sys.exit(1)
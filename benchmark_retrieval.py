@@ -0,0 +1,107 @@
+# File: benchmark_retrieval.py
+"""
+Compara el tiempo por consulta de los motores de recuperación del catálogo.
+
+Uso: python benchmark_retrieval.py [ruta_del_pdf] [factor_sintético]
+"""
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from catalog_index import get_catalog_index
+from retrieval import find_relevant_chunks, BM25Index, HeuristicIndex, VectorizedScorer
+
+QUERIES = [
+    "laptop lenovo thinkpad",
+    "laptop de 1500 soles",
+    "precio de la dell latitude 3350",
+    "monitor 24 pulgadas",
+    "impresora epson 800",
+    "core i5 8gb ram 256gb ssd",
+]
+
+
+def build_synthetic_catalog(chunks, factor, seed=42):
+    """Genera un catálogo factor veces más grande alterando los números de cada fragmento"""
+    rng = random.Random(seed)
+    synthetic = []
+    for copy in range(factor):
+        for chunk in chunks:
+            words = chunk.split(' ')
+            synthetic.append(' '.join(
+                str(int(word) + rng.randint(-50, 50)) if word.isdigit() and copy else word
+                for word in words))
+    return synthetic
+
+
+def time_queries(search, repeat):
+    """Tiempo medio por consulta en milisegundos (la salida por consola se descarta)"""
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in QUERIES:
+                search(query)
+        elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(QUERIES))
+
+
+def run_benchmark(chunks, label, repeat):
+    print(f"\n📊 {label}: {len(chunks)} fragmentos")
+
+    build_start = time.perf_counter()
+    bm25 = BM25Index.from_chunks(chunks)
+    bm25_build = time.perf_counter() - build_start
+
+    build_start = time.perf_counter()
+    heuristic = HeuristicIndex.from_chunks(chunks)
+    heuristic.score("")
+    heuristic_build = time.perf_counter() - build_start
+
+    vectorized = None
+    try:
+        build_start = time.perf_counter()
+        vectorized = VectorizedScorer.from_chunks(chunks)
+        vectorized.score("")
+        vectorized_build = time.perf_counter() - build_start
+    except ImportError:
+        print("⚠️ numpy/scipy no están instalados: se omite VectorizedScorer")
+
+    legacy_ms = time_queries(lambda query: find_relevant_chunks(chunks, query), repeat)
+    print(f"- find_relevant_chunks: {legacy_ms:8.2f} ms/consulta")
+    heuristic_ms = time_queries(heuristic.search, repeat)
+    print(f"- HeuristicIndex:       {heuristic_ms:8.2f} ms/consulta (construcción {heuristic_build * 1000:.0f} ms, "
+          f"x{legacy_ms / heuristic_ms:.1f})")
+    streaming_ms = time_queries(lambda query: heuristic.search(query, streaming=True), repeat)
+    print(f"- HeuristicIndex (stream):{streaming_ms:8.2f} ms/consulta")
+    print(f"- BM25Index:            {time_queries(bm25.search, repeat):8.2f} ms/consulta (construcción {bm25_build * 1000:.0f} ms)")
+
+    with redirect_stdout(io.StringIO()):
+        mismatches = [query for query in QUERIES
+                      if find_relevant_chunks(chunks, query) != heuristic.search(query)]
+    print(f"- HeuristicIndex idéntico a find_relevant_chunks: {'sí' if not mismatches else 'no: ' + ', '.join(mismatches)}")
+
+    if vectorized is not None:
+        vectorized_ms = time_queries(vectorized.search, repeat)
+        print(f"- VectorizedScorer:     {vectorized_ms:8.2f} ms/consulta (construcción {vectorized_build * 1000:.0f} ms, "
+              f"x{legacy_ms / vectorized_ms:.1f})")
+
+        # Los resultados deben coincidir con la heurística original
+        with redirect_stdout(io.StringIO()):
+            mismatches = [query for query in QUERIES
+                          if find_relevant_chunks(chunks, query) != vectorized.search(query)]
+        print(f"- VectorizedScorer idéntico a find_relevant_chunks: {'sí' if not mismatches else 'no: ' + ', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else './catalogo_.pdf'
+    factor = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    chunks = get_catalog_index(pdf_path).get_chunks()
+    if not chunks:
+        print("❌ No se pudieron obtener los fragmentos del catálogo")
+        sys.exit(1)
+
+    run_benchmark(chunks, pdf_path, repeat=20)
+    run_benchmark(build_synthetic_catalog(chunks, factor), f"Catálogo sintético x{factor}", repeat=2)
@@ -0,0 +1,611 @@
+# File: catalog_index.py
+import json
+import os
+import hashlib
+import threading
+import re
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from chunk_store import BLOB_EXTENSION, ChunkStore, write_chunk_store, remove_chunk_store
+
+# Directorio donde se guarda el índice pre-procesado del catálogo
+CATALOG_CACHE_DIR = os.environ.get('CATALOG_CACHE_DIR', './.catalog_cache')
+
+# Versión del formato del índice; cambiarla fuerza la reconstrucción
+CATALOG_INDEX_VERSION = 6
+
+# Parámetros por defecto del fragmentado
+DEFAULT_CHUNK_SIZE = 250
+DEFAULT_CHUNK_OVERLAP = 80
+
+# Unidad de chunk_size/chunk_overlap: 'chars' (caracteres) o 'tokens' (tokens aproximados)
+CATALOG_CHUNK_UNIT = os.environ.get('CATALOG_CHUNK_UNIT', 'chars')
+CHARS_PER_TOKEN = 4
+
+NON_BLANK_LINE_REGEX = re.compile(r'[^\n]*\S[^\n]*')
+WORD_REGEX = re.compile(r'\S+')
+
+# Procesos usados para extraer el texto del PDF al reconstruir el índice (1 = secuencial)
+CATALOG_EXTRACT_WORKERS = int(os.environ.get('CATALOG_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+
+
+def _extract_pages(pdf_path, page_numbers):
+    """Extrae el texto de las páginas indicadas y mide el tiempo de cada una"""
+    import PyPDF2
+
+    results = []
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_num in page_numbers:
+            page_start = time.perf_counter()
+            page_text = reader.pages[page_num].extract_text() or ""
+            results.append((page_num, page_text, time.perf_counter() - page_start))
+    return results
+
+
+def _count_pdf_pages(pdf_path):
+    import PyPDF2
+
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def _hash_pdf_object(obj, digest, memo):
+    """
+    Añade al digest un objeto del PDF con todo lo que referencia (diccionarios, arrays
+    y el contenido de los flujos). Los objetos indirectos se resumen una vez en memo
+    y se reutilizan entre páginas; una referencia circular aporta solo su número.
+    """
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in memo:
+            memo[key] = None
+            object_digest = hashlib.sha256()
+            _hash_pdf_object(obj.get_object(), object_digest, memo)
+            memo[key] = object_digest.digest()
+        digest.update(memo[key] or repr(key).encode())
+    elif isinstance(obj, DictionaryObject):
+        if isinstance(obj, StreamObject):
+            try:
+                digest.update(obj.get_data())
+            except Exception:
+                # Filtro no soportado: el cambio lo detecta el hash del archivo completo
+                digest.update(b'?')
+        for name in sorted(obj):
+            digest.update(name.encode())
+            _hash_pdf_object(obj.raw_get(name), digest, memo)
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            _hash_pdf_object(item, digest, memo)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode())
+
+
+def compute_page_hashes(pdf_path):
+    """
+    Calcula el hash SHA-256 de cada página del PDF: su flujo de contenido y sus recursos
+    (XObjects de formulario, imágenes y fuentes con sus tablas ToUnicode), que también
+    cambian el texto extraído aunque el flujo de la página sea el mismo.
+    """
+    import PyPDF2
+    from PyPDF2.generic import NameObject
+
+    hashes = []
+    memo = {}
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            digest = hashlib.sha256()
+            contents = page.get_contents()
+            digest.update(contents.get_data() if contents is not None else b'')
+            resources = page.raw_get(NameObject('/Resources')) if '/Resources' in page else None
+            if resources is not None:
+                _hash_pdf_object(resources, digest, memo)
+            hashes.append(digest.hexdigest())
+    return hashes
+
+
+def extract_pages_from_pdf(pdf_path, workers=None, pages_per_task=None, page_numbers=None):
+    """
+    Extrae el texto de cada página del PDF (o solo de page_numbers).
+
+    Con workers > 1 los grupos de páginas se reparten en un ProcessPoolExecutor
+    y los resultados se ordenan por número de página. Devuelve una tupla
+    (textos_por_página, tiempos_por_página) o (None, None) si hay error.
+
+    Los procesos se crean con 'spawn' y no con fork: la reconstrucción puede empezar
+    en un hilo de retrieval_fanout mientras otros hilos tienen locks tomados, y un
+    proceso hijo creado con fork heredaría esos locks bloqueados para siempre.
+    """
+    try:
+        if not os.path.exists(pdf_path):
+            print(f"❌ Archivo PDF no encontrado: {pdf_path}")
+            return None, None
+
+        if workers is None:
+            workers = CATALOG_EXTRACT_WORKERS
+
+        if page_numbers is None:
+            page_numbers = list(range(_count_pdf_pages(pdf_path)))
+        else:
+            page_numbers = sorted(page_numbers)
+
+        total_pages = len(page_numbers)
+        if workers <= 1 or total_pages < 2:
+            results = _extract_pages(pdf_path, page_numbers)
+        else:
+            workers = min(workers, total_pages)
+            if not pages_per_task:
+                pages_per_task = max(1, -(-total_pages // (workers * 2)))
+            groups = [page_numbers[start:start + pages_per_task]
+                      for start in range(0, total_pages, pages_per_task)]
+            results = []
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_extract_pages, pdf_path, group) for group in groups]
+                for future in futures:
+                    results.extend(future.result())
+
+        results.sort(key=lambda item: item[0])
+        pages = [page_text for _, page_text, _ in results]
+        timings = [elapsed for _, _, elapsed in results]
+
+        if timings:
+            slowest = max(range(len(timings)), key=timings.__getitem__)
+            print(f"⏱️ Extraídas {len(pages)} páginas en {sum(timings):.2f}s de CPU "
+                  f"(workers: {max(1, workers)}, página más lenta: {results[slowest][0] + 1} con {timings[slowest]:.2f}s)")
+
+        return pages, timings
+    except ImportError:
+        print("❌ Error: La librería PyPDF2 no está instalada. No se puede extraer texto del PDF.")
+        return None, None
+    except Exception as e:
+        print(f"❌ Error al extraer texto del PDF: {e}")
+        return None, None
+
+
+def extract_text_from_pdf(pdf_path, workers=1):
+    """Extrae el texto de un archivo PDF"""
+    pages, _ = extract_pages_from_pdf(pdf_path, workers=workers)
+    if pages is None:
+        return None
+    return "".join(f"{page_text}\n" for page_text in pages)
+
+
+def compact_text(text):
+    """Elimina las líneas vacías del texto, dejando una línea por renglón con contenido"""
+    return '\n'.join(line for line in text.split('\n') if line.strip())
+
+
+# Expresiones para localizar las últimas N palabras sobre el texto invertido, por N
+_overlap_patterns = {}
+
+
+def _overlap_start(text, start, end, overlap_words):
+    """Posición donde empiezan las últimas overlap_words palabras de text[start:end]"""
+    pattern = _overlap_patterns.get(overlap_words)
+    if pattern is None:
+        pattern = re.compile(r'\s*(?:\S+\s+){%d}\S+' % (overlap_words - 1))
+        _overlap_patterns[overlap_words] = pattern
+
+    # Se busca en una ventana invertida al final del fragmento y solo se amplía si
+    # no contiene suficientes palabras completas
+    window = overlap_words * 8
+    while True:
+        window_start = max(start, end - window)
+        reversed_window = text[window_start:end][::-1]
+        match = pattern.match(reversed_window)
+        if match and (match.end() < len(reversed_window) or window_start == start):
+            return end - match.end()
+        if window_start == start:
+            # El fragmento tiene menos palabras que el solapamiento: se repite completo
+            return start
+        window *= 2
+
+
+def chunk_spans(text, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP, unit='chars'):
+    """
+    Divide el texto en fragmentos con solapamiento y devuelve sus posiciones (inicio, fin).
+
+    Recorre una sola vez las líneas con contenido y los inicios de palabra del texto
+    original, sin construir cadenas intermedias: cada fragmento es text[inicio:fin] y
+    el solapamiento son las últimas chunk_overlap / 5 palabras del fragmento anterior.
+    La longitud se mide como en el fragmentado original, con las palabras del
+    solapamiento separadas por un espacio, así que los cortes y las palabras de cada
+    fragmento son los mismos; solo cambian los espacios del solapamiento, que conserva
+    los del texto. Con unit='tokens' los tamaños se expresan en tokens aproximados
+    (CHARS_PER_TOKEN caracteres por token).
+    """
+    if not text:
+        return []
+
+    if unit == 'tokens':
+        chunk_size *= CHARS_PER_TOKEN
+        chunk_overlap *= CHARS_PER_TOKEN
+    elif unit != 'chars':
+        raise ValueError(f"Unidad de fragmentado desconocida: {unit}")
+
+    overlap_words = int(chunk_overlap / 5)
+
+    spans = []
+    start = end = None
+    # Longitud del fragmento tal como lo medía el fragmentado original
+    length = 0
+    for line in NON_BLANK_LINE_REGEX.finditer(text):
+        line_start, line_end = line.span()
+        line_length = line_end - line_start
+        if start is None:
+            start, end = line_start, line_end
+            length = line_length
+        elif length + line_length > chunk_size:
+            spans.append((start, end))
+            if overlap_words > 0:
+                start = _overlap_start(text, start, end, overlap_words)
+                # Las palabras del solapamiento (unas pocas) unidas por un espacio, y otro antes de la línea
+                words = text[start:end].split()
+                length = sum(map(len, words)) + len(words) + line_length
+            else:
+                start = line_start
+                length = line_length
+            end = line_end
+        else:
+            end = line_end
+            length += 1 + line_length
+
+    if start is not None:
+        spans.append((start, end))
+
+    return spans
+
+
+def split_text_into_chunks(text, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP, unit='chars'):
+    """Divide el texto en fragmentos más pequeños con solapamiento"""
+    if not text:
+        return []
+
+    text = compact_text(text)
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size, chunk_overlap, unit)]
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Calcula el hash SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CatalogIndex:
+    """
+    Índice persistente del catálogo PDF.
+
+    El PDF se procesa una sola vez y los fragmentos se guardan en disco junto
+    con la firma del archivo (tamaño, fecha de modificación y hash SHA-256).
+    Mientras el archivo no cambie, las consultas reutilizan los fragmentos ya
+    calculados; si cambia, el índice se reconstruye automáticamente.
+
+    Los textos de los fragmentos se guardan en un ChunkStore (blob UTF-8 más tabla
+    de desplazamientos abierto con mmap), compartido entre procesos por la caché
+    de páginas del sistema; el JSON solo contiene el manifiesto.
+
+    El índice guarda además un manifiesto con el hash de cada página: al
+    reconstruir solo se extraen y fragmentan las páginas nuevas o modificadas,
+    y los suscriptores (índices de puntuación derivados) reciben únicamente los
+    fragmentos eliminados y añadidos para actualizarse sin reconstruirse.
+    """
+
+    def __init__(self, pdf_path, cache_dir=CATALOG_CACHE_DIR,
+                 chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP, chunk_unit=CATALOG_CHUNK_UNIT):
+        self.pdf_path = pdf_path
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_unit = chunk_unit
+        self.signature = None
+        # Manifiesto de páginas: [{"hash": str, "chunk_ids": [int, ...]}, ...]
+        self.pages = []
+        self.next_chunk_id = 0
+        # Textos de los fragmentos en un almacén mmap compartido (blob UTF-8 + desplazamientos)
+        self.store = None
+        self.store_name = None
+        self._retired_stores = []
+        self.loaded = False
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.cache_dir, f"{self._name}.index.json")
+
+    @property
+    def _name(self):
+        # El hash de la ruta absoluta evita que dos PDF con el mismo nombre en carpetas
+        # distintas compartan (y se pisen) el manifiesto y los almacenes de la caché
+        path_digest = hashlib.sha256(os.path.abspath(self.pdf_path).encode('utf-8')).hexdigest()[:12]
+        return f"{os.path.splitext(os.path.basename(self.pdf_path))[0]}-{path_digest}"
+
+    @property
+    def chunk_ids(self):
+        """Ids de los fragmentos en orden de página"""
+        return [chunk_id for page in self.pages for chunk_id in page["chunk_ids"]]
+
+    @property
+    def chunks(self):
+        """Textos de los fragmentos en orden de página (ChunkStore de solo lectura)"""
+        if not self.loaded:
+            return None
+        return self.store
+
+    def get_chunk_text(self, chunk_id):
+        """Devuelve el texto de un fragmento por su id"""
+        with self._lock:
+            return self.store.get(chunk_id) if self.store is not None else None
+
+    def add_listener(self, listener):
+        """
+        Registra un índice derivado que se actualiza con cada cambio del catálogo.
+
+        El listener debe implementar apply_catalog_changes(removed_ids, added_chunks),
+        donde added_chunks es una lista de tuplas (chunk_id, texto). Al registrarse
+        recibe todos los fragmentos actuales como añadidos.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            if self.loaded:
+                listener.apply_catalog_changes([], list(self.store.items()))
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, removed_ids, added_chunks):
+        if not removed_ids and not added_chunks:
+            return
+        for listener in self._listeners:
+            try:
+                listener.apply_catalog_changes(removed_ids, added_chunks)
+            except Exception as e:
+                print(f"⚠️ Error actualizando índice derivado del catálogo: {e}")
+
+    def _stat_signature(self):
+        """Devuelve (tamaño, mtime) del PDF o None si no existe"""
+        try:
+            stat = os.stat(self.pdf_path)
+        except OSError:
+            return None
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def _params(self):
+        return {
+            "version": CATALOG_INDEX_VERSION,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "chunk_unit": self.chunk_unit
+        }
+
+    def _read_cache(self):
+        """Lee el índice guardado en disco si fue generado con los mismos parámetros"""
+        if not os.path.exists(self.cache_path):
+            return None
+
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el índice del catálogo: {e}")
+            return None
+
+        if cached.get("params") != self._params():
+            return None
+        return cached
+
+    def _cache_is_current(self, cached, stat_sig):
+        """Comprueba si el índice guardado corresponde al PDF actual"""
+        signature = cached.get("signature") or {}
+        if signature.get("size") != stat_sig["size"]:
+            return False
+
+        if signature.get("mtime") != stat_sig["mtime"]:
+            # La fecha cambió pero el tamaño no: confirmar con el hash del contenido
+            if file_sha256(self.pdf_path) != signature.get("sha256"):
+                return False
+            cached["signature"] = dict(signature, mtime=stat_sig["mtime"])
+            self._save_to_disk(cached)
+        return True
+
+    def _swap_store(self, store_name):
+        """Abre el almacén indicado y retira el anterior"""
+        store = ChunkStore(os.path.join(self.cache_dir, store_name))
+
+        # El almacén anterior se cierra en el siguiente cambio, por si alguna
+        # consulta en curso todavía está leyendo sus fragmentos
+        for old_store in self._retired_stores:
+            old_store.close()
+            if os.path.basename(old_store.path_prefix) != store_name:
+                remove_chunk_store(old_store.path_prefix)
+        self._retired_stores = [self.store] if self.store is not None else []
+
+        self.store = store
+        self.store_name = store_name
+
+    def _remove_stale_stores(self):
+        """Elimina almacenes de ejecuciones anteriores que ya no usa el manifiesto"""
+        in_use = {self.store_name} | {os.path.basename(store.path_prefix) for store in self._retired_stores}
+        prefix = f"{self._name}."
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.startswith(prefix) and file_name.endswith(BLOB_EXTENSION):
+                store_name = file_name[:-len(BLOB_EXTENSION)]
+                if store_name not in in_use:
+                    remove_chunk_store(os.path.join(self.cache_dir, store_name))
+
+    def _adopt(self, cached):
+        """Reemplaza el estado en memoria por el del índice guardado"""
+        try:
+            self._swap_store(cached["store"])
+        except Exception as e:
+            print(f"⚠️ No se pudo abrir el almacén de fragmentos del catálogo: {e}")
+            return False
+
+        removed_ids = self.chunk_ids
+        self.signature = cached.get("signature")
+        self.pages = cached.get("pages", [])
+        self.next_chunk_id = cached.get("next_chunk_id", len(self.store))
+        self.loaded = True
+        self._notify(removed_ids, list(self.store.items()))
+        return True
+
+    def _snapshot(self):
+        return {
+            "params": self._params(),
+            "signature": self.signature,
+            "pages": self.pages,
+            "next_chunk_id": self.next_chunk_id,
+            "store": self.store_name
+        }
+
+    def _save_to_disk(self, data):
+        """Guarda el índice en disco de forma atómica"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el índice del catálogo: {e}")
+
+    def _rebuild(self, stat_sig):
+        """Re-indexa solo las páginas cuyo contenido cambió y guarda el nuevo índice"""
+        print(f"📄 Actualizando índice del catálogo: {self.pdf_path}")
+        try:
+            page_hashes = compute_page_hashes(self.pdf_path)
+        except ImportError:
+            print("❌ Error: La librería PyPDF2 no está instalada. No se puede extraer texto del PDF.")
+            return False
+        except Exception as e:
+            print(f"❌ Error al leer las páginas del PDF: {e}")
+            return False
+
+        # Páginas anteriores disponibles para reutilizar, por hash de contenido
+        reusable = {}
+        for page in self.pages:
+            reusable.setdefault(page["hash"], []).append(page)
+
+        new_pages = []
+        changed = []
+        for page_num, page_hash in enumerate(page_hashes):
+            candidates = reusable.get(page_hash)
+            if candidates:
+                new_pages.append(candidates.pop(0))
+            else:
+                new_pages.append(None)
+                changed.append(page_num)
+
+        sha256 = file_sha256(self.pdf_path)
+        if not changed and not any(reusable.values()) and self.signature and sha256 != self.signature.get("sha256"):
+            # El archivo cambió pero ninguna página: el cambio está en algo que los hashes
+            # de página no cubren, así que se re-procesan todas por seguridad
+            print("⚠️ El PDF cambió sin cambios en las páginas: re-procesando todas")
+            reusable = {None: self.pages}
+            new_pages = [None] * len(page_hashes)
+            changed = list(range(len(page_hashes)))
+
+        page_texts = []
+        if changed:
+            page_texts, _ = extract_pages_from_pdf(self.pdf_path, workers=CATALOG_EXTRACT_WORKERS, page_numbers=changed)
+            if page_texts is None:
+                return False
+
+        next_chunk_id = self.next_chunk_id
+        new_texts = {}
+        added_chunks = []
+        for page_num, page_text in zip(changed, page_texts):
+            chunk_ids = []
+            for chunk in split_text_into_chunks(page_text, self.chunk_size, self.chunk_overlap, self.chunk_unit):
+                new_texts[next_chunk_id] = chunk
+                chunk_ids.append(next_chunk_id)
+                added_chunks.append((next_chunk_id, chunk))
+                next_chunk_id += 1
+            new_pages[page_num] = {"hash": page_hashes[page_num], "chunk_ids": chunk_ids}
+
+        removed_ids = [chunk_id for pages in reusable.values() for page in pages for chunk_id in page["chunk_ids"]]
+
+        # Nuevo almacén con los fragmentos reutilizados (leídos del almacén actual) y los nuevos
+        ordered_ids = [chunk_id for page in new_pages for chunk_id in page["chunk_ids"]]
+        if self.store is None or list(self.store.ids) != ordered_ids:
+            store_name = f"{self._name}.{time.time_ns():x}"
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                write_chunk_store(
+                    os.path.join(self.cache_dir, store_name),
+                    [new_texts[chunk_id] if chunk_id in new_texts else self.store.get(chunk_id) for chunk_id in ordered_ids],
+                    ordered_ids
+                )
+                self._swap_store(store_name)
+            except Exception as e:
+                print(f"❌ Error al guardar los fragmentos del catálogo: {e}")
+                return False
+
+        self.pages = new_pages
+        self.next_chunk_id = next_chunk_id
+        self.signature = dict(stat_sig, sha256=sha256)
+        self.loaded = True
+        self._notify(removed_ids, added_chunks)
+        self._save_to_disk(self._snapshot())
+        self._remove_stale_stores()
+        print(f"✅ Índice del catálogo actualizado: {len(changed)}/{len(page_hashes)} páginas re-procesadas, "
+              f"{len(added_chunks)} fragmentos añadidos, {len(removed_ids)} eliminados")
+        return True
+
+    def load(self):
+        """Carga el índice desde caché o lo actualiza si el PDF cambió"""
+        with self._lock:
+            stat_sig = self._stat_signature()
+            if stat_sig is None:
+                print(f"❌ Archivo PDF no encontrado: {self.pdf_path}")
+                return False
+
+            if (self.loaded and self.signature and
+                    self.signature.get("size") == stat_sig["size"] and
+                    self.signature.get("mtime") == stat_sig["mtime"]):
+                return True
+
+            if not self.loaded:
+                cached = self._read_cache()
+                # Aunque el PDF haya cambiado, el manifiesto guardado sirve de base incremental
+                if cached is not None and self._adopt(cached):
+                    if self._cache_is_current(cached, stat_sig):
+                        self.signature = cached["signature"]
+                        print(f"✅ Índice del catálogo cargado desde caché ({len(self.store)} fragmentos)")
+                        return True
+
+            return self._rebuild(stat_sig)
+
+    def get_chunks(self):
+        """Devuelve los fragmentos del catálogo, reconstruyendo el índice si es necesario"""
+        if not self.load():
+            return None
+        return self.chunks
+
+
+# Índices abiertos por ruta de PDF
+_catalog_indexes = {}
+_catalog_indexes_lock = threading.Lock()
+
+
+def get_catalog_index(pdf_path):
+    """Devuelve el índice compartido del catálogo para la ruta indicada"""
+    key = os.path.abspath(pdf_path)
+    with _catalog_indexes_lock:
+        index = _catalog_indexes.get(key)
+        if index is None:
+            index = CatalogIndex(pdf_path)
+            _catalog_indexes[key] = index
+        return index
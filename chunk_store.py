@@ -0,0 +1,137 @@
+# File: chunk_store.py
+import os
+import mmap
+import sys
+from array import array
+
+# Extensiones de los archivos del almacén: texto UTF-8 y tabla de desplazamientos
+BLOB_EXTENSION = '.blob'
+OFFSETS_EXTENSION = '.offsets'
+
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def write_chunk_store(path_prefix, chunks, chunk_ids=None):
+    """
+    Guarda los fragmentos como un único blob UTF-8 y una tabla de desplazamientos.
+
+    El archivo .offsets contiene un array('q') con [n, desplazamientos (n + 1), ids (n)],
+    de modo que el fragmento i ocupa blob[offsets[i]:offsets[i + 1]].
+    """
+    if chunk_ids is None:
+        chunk_ids = range(len(chunks))
+
+    offsets = array('q', [0])
+    ids = array('q', chunk_ids)
+    if len(ids) != len(chunks):
+        raise ValueError("chunks y chunk_ids deben tener la misma longitud")
+
+    def write_blob(f):
+        position = 0
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            f.write(data)
+            position += len(data)
+            offsets.append(position)
+
+    _write_atomic(path_prefix + BLOB_EXTENSION, write_blob)
+
+    header = array('q', [len(ids)])
+    table = header + offsets + ids
+    if sys.byteorder != 'little':
+        table.byteswap()
+    _write_atomic(path_prefix + OFFSETS_EXTENSION, table.tofile)
+
+
+def remove_chunk_store(path_prefix):
+    """Elimina los archivos de un almacén (ignorando los que no existan o sigan abiertos)"""
+    for extension in (BLOB_EXTENSION, OFFSETS_EXTENSION):
+        try:
+            os.remove(path_prefix + extension)
+        except OSError:
+            pass
+
+
+class ChunkStore:
+    """
+    Almacén de fragmentos de solo lectura respaldado por mmap.
+
+    El texto de todos los fragmentos se abre con mmap, así que varios procesos del
+    bot en la misma máquina comparten una única copia del catálogo en la caché de
+    páginas del sistema; cada fragmento se decodifica solo al leerlo. Se comporta
+    como una secuencia de textos en orden y permite buscar por id de fragmento.
+    """
+
+    def __init__(self, path_prefix):
+        self.path_prefix = path_prefix
+
+        with open(path_prefix + OFFSETS_EXTENSION, 'rb') as f:
+            table = array('q')
+            table.frombytes(f.read())
+        if sys.byteorder != 'little':
+            table.byteswap()
+
+        count = table[0] if table else 0
+        if len(table) != 1 + (count + 1) + count:
+            raise ValueError(f"Tabla de desplazamientos inválida: {path_prefix + OFFSETS_EXTENSION}")
+        self.offsets = table[1:count + 2]
+        self.ids = table[count + 2:]
+        self._positions = {chunk_id: position for position, chunk_id in enumerate(self.ids)}
+
+        self._file = open(path_prefix + BLOB_EXTENSION, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size != self.offsets[-1]:
+            self._file.close()
+            raise ValueError(f"El blob no coincide con la tabla de desplazamientos: {path_prefix + BLOB_EXTENSION}")
+        # mmap no admite archivos vacíos
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("índice de fragmento fuera de rango")
+        return self._mmap[self.offsets[position]:self.offsets[position + 1]].decode('utf-8')
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._positions
+
+    def get(self, chunk_id, default=None):
+        """Devuelve el texto del fragmento con el id indicado"""
+        position = self._positions.get(chunk_id)
+        if position is None:
+            return default
+        return self[position]
+
+    def items(self):
+        """Genera (chunk_id, texto) en orden"""
+        for position, chunk_id in enumerate(self.ids):
+            yield chunk_id, self[position]
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
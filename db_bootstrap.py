@@ -0,0 +1,120 @@
+# File: db_bootstrap.py
+"""
+Prepara la tabla productos para los backends de búsqueda indexados.
+
+Uso: python db_bootstrap.py [paso ...]    (por defecto se ejecutan todos los pasos)
+
+Pasos disponibles:
+  fts      columna generada busqueda (tsvector en español y sin tildes) con índice GIN
+           e índice por precio; necesario para PRODUCT_SEARCH_BACKEND=fts
+  trigram  extensión pg_trgm e índices GIN de trigramas sobre nombre, descripción,
+           categoría y código; necesario para PRODUCT_SEARCH_BACKEND=trigram
+  notify   trigger que envía NOTIFY al canal productos_cambios cuando cambia la tabla;
+           necesario para PRODUCT_MIRROR=notify
+
+Todas las sentencias son idempotentes, así que el script puede ejecutarse de nuevo
+sin problemas. Crear extensiones requiere un usuario con permisos suficientes.
+"""
+import sys
+import time
+
+from db_pool import db_pool
+from product_search import FTS_CONFIG, FTS_CATEGORY_WEIGHT, TRGM_COLUMNS, trgm_column_expression
+from product_mirror import PRODUCT_MIRROR_CHANNEL
+
+# unaccent() no está marcada como IMMUTABLE y no puede usarse en columnas generadas
+# ni en índices; f_unaccent fija el diccionario para poder hacerlo
+UNACCENT_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+]
+
+# Texto buscable de cada producto; solo la categoría lleva el peso FTS_CATEGORY_WEIGHT
+BUSQUEDA_EXPRESSION = f"""
+        setweight(to_tsvector('{FTS_CONFIG}', f_unaccent(coalesce(nombre, ''))), 'A') ||
+        setweight(to_tsvector('{FTS_CONFIG}', f_unaccent(coalesce(codigo, ''))), 'A') ||
+        setweight(to_tsvector('{FTS_CONFIG}', f_unaccent(coalesce(categoria, ''))), '{FTS_CATEGORY_WEIGHT}') ||
+        setweight(to_tsvector('{FTS_CONFIG}', f_unaccent(coalesce(descripcion, ''))), 'C')
+"""
+
+FTS_STATEMENTS = UNACCENT_STATEMENTS + [
+    f"""
+    ALTER TABLE productos ADD COLUMN IF NOT EXISTS busqueda tsvector
+    GENERATED ALWAYS AS ({BUSQUEDA_EXPRESSION}) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS productos_busqueda_gin ON productos USING GIN (busqueda)",
+    "CREATE INDEX IF NOT EXISTS productos_precio_idx ON productos (precio)",
+    "ANALYZE productos",
+]
+
+TRIGRAM_STATEMENTS = UNACCENT_STATEMENTS + [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+] + [
+    f"CREATE INDEX IF NOT EXISTS productos_{column}_trgm ON productos USING GIN ({trgm_column_expression(column)} gin_trgm_ops)"
+    for column in TRGM_COLUMNS
+] + [
+    "CREATE INDEX IF NOT EXISTS productos_precio_idx ON productos (precio)",
+    "ANALYZE productos",
+]
+
+NOTIFY_STATEMENTS = [
+    f"""
+    CREATE OR REPLACE FUNCTION productos_notify() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        PERFORM pg_notify('{PRODUCT_MIRROR_CHANNEL}', TG_OP);
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS productos_notify ON productos",
+    """
+    CREATE TRIGGER productos_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON productos
+    FOR EACH STATEMENT EXECUTE FUNCTION productos_notify()
+    """,
+]
+
+BOOTSTRAP_STEPS = {
+    "fts": FTS_STATEMENTS,
+    "trigram": TRIGRAM_STATEMENTS,
+    "notify": NOTIFY_STATEMENTS,
+}
+
+
+def run_step(name):
+    """Ejecuta las sentencias de un paso en una sola transacción"""
+    statements = BOOTSTRAP_STEPS[name]
+    print(f"🛠️ Paso '{name}': {len(statements)} sentencias")
+    start = time.perf_counter()
+    with db_pool.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                for statement in statements:
+                    print('  ', ' '.join(statement.split())[:100])
+                    cur.execute(statement)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    print(f"✅ Paso '{name}' completado en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    steps = sys.argv[1:] or list(BOOTSTRAP_STEPS)
+    unknown = [step for step in steps if step not in BOOTSTRAP_STEPS]
+    if unknown:
+        print(f"❌ Pasos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(BOOTSTRAP_STEPS)})")
+        sys.exit(1)
+
+    for step in steps:
+        try:
+            run_step(step)
+        except Exception as e:
+            print(f"❌ Error en el paso '{step}': {e}")
+            sys.exit(1)
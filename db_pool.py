@@ -0,0 +1,170 @@
+# File: db_pool.py
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+# Tamaño del pool de conexiones a PostgreSQL
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 5))
+
+# Segundos máximos esperando una conexión libre antes de fallar
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+# Una conexión que lleva más de estos segundos sin usarse se comprueba con SELECT 1 al prestarla
+DB_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_HEALTHCHECK_INTERVAL', 30))
+
+
+class PoolTimeoutError(pool.PoolError):
+    """No quedó ninguna conexión libre dentro del tiempo de espera"""
+
+
+def get_connection_settings():
+    """Parámetros de conexión a PostgreSQL tomados de las variables de entorno"""
+    return {
+        "host": os.environ.get('DB_HOST', 'localhost'),
+        "database": os.environ.get('DB_NAME', 'catalogo_db'),
+        "user": os.environ.get('DB_USER', 'postgres'),
+        "password": os.environ.get('DB_PASSWORD', '123'),
+        "port": os.environ.get('DB_PORT', '5432'),
+    }
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones a PostgreSQL compartido por todo el proceso.
+
+    Envuelve psycopg2.pool.ThreadedConnectionPool (que se crea en el primer uso) y
+    añade una espera acotada cuando todas las conexiones están prestadas, una
+    comprobación de salud al prestar conexiones inactivas, reconexión si la conexión
+    está rota y métricas de espera.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 healthcheck_interval=DB_HEALTHCHECK_INTERVAL, settings=None):
+        self.minconn = max(0, minconn)
+        self.maxconn = max(1, maxconn, self.minconn)
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.settings = settings
+        self._pool = None
+        self._lock = threading.Lock()
+        # ThreadedConnectionPool lanza PoolError si se agota; el semáforo hace esperar en su lugar
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._last_used = {}
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.healthchecks = 0
+        self.reconnects = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                settings = self.settings or get_connection_settings()
+                self._pool = pool.ThreadedConnectionPool(self.minconn, self.maxconn, **settings)
+                print(f'✅ Pool de conexiones a PostgreSQL creado ({self.minconn}-{self.maxconn} conexiones)')
+            return self._pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        self.healthchecks += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self, db_pool):
+        conn = db_pool.getconn()
+        if self._is_healthy(conn):
+            return conn
+
+        # Conexión rota (reinicio del servidor, timeout de red...): se descarta y se abre otra
+        print('⚠️ Conexión a PostgreSQL no válida: reconectando')
+        self._last_used.pop(id(conn), None)
+        db_pool.putconn(conn, close=True)
+        self.reconnects += 1
+        return db_pool.getconn()
+
+    def _release(self, db_pool, conn, broken):
+        try:
+            if not broken and not conn.closed:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+                db_pool.putconn(conn)
+                return
+        except psycopg2.Error:
+            pass
+        self._last_used.pop(id(conn), None)
+        db_pool.putconn(conn, close=True)
+
+    @contextmanager
+    def connection(self):
+        """
+        Presta una conexión del pool y la devuelve al salir del bloque.
+
+        La transacción abierta se revierte al devolverla; si durante el bloque se produjo
+        un error de conexión, la conexión se cierra en lugar de reutilizarse.
+        """
+        db_pool = self._get_pool()
+
+        wait_start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.timeouts += 1
+            raise PoolTimeoutError(f'No hay conexiones libres tras esperar {self.timeout:.1f}s')
+        waited = time.perf_counter() - wait_start
+        self.checkouts += 1
+        if waited > 0.001:
+            self.waits += 1
+        self.wait_time += waited
+        self.max_wait = max(self.max_wait, waited)
+
+        try:
+            conn = self._checkout(db_pool)
+        except Exception:
+            self._slots.release()
+            raise
+
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._release(db_pool, conn, broken)
+            self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            self._last_used.clear()
+
+    def stats(self):
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "avg_wait_ms": round(self.wait_time * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "timeouts": self.timeouts,
+            "healthchecks": self.healthchecks,
+            "reconnects": self.reconnects
+        }
+
+
+db_pool = ConnectionPool()
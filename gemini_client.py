@@ -0,0 +1,286 @@
+# File: gemini_client.py
+import os
+import re
+import json
+import time
+import random
+import threading
+from bisect import bisect_left
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Clave de la API (obligatoria): sin ella las llamadas fallan con GeminiError
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+
+# URL base de la API; se puede apuntar a un servidor local de pruebas (p. ej. http://127.0.0.1:8080/v1beta)
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com/v1beta')
+
+# Segundos para establecer la conexión y segundos máximos sin recibir datos de la respuesta
+GEMINI_CONNECT_TIMEOUT = float(os.environ.get('GEMINI_CONNECT_TIMEOUT', 5))
+GEMINI_READ_TIMEOUT = float(os.environ.get('GEMINI_READ_TIMEOUT', 30))
+
+# Conexiones keep-alive que se conservan abiertas hacia la API
+GEMINI_POOL_MAXSIZE = int(os.environ.get('GEMINI_POOL_MAXSIZE', 10))
+
+# Reintentos ante 429/5xx o errores de red, con espera exponencial aleatoria (full jitter)
+GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', 3))
+GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE', 0.5))
+GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX', 8))
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+# Respuestas en streaming (streamGenerateContent con SSE) enviadas por secciones al usuario
+GEMINI_STREAMING = os.environ.get('GEMINI_STREAMING', '1') == '1'
+
+# Caracteres mínimos de la primera sección enviada (para no mandar solo el título) y de las
+# siguientes (se agrupan secciones para no enviar un mensaje por viñeta)
+GEMINI_STREAM_FIRST_MIN_CHARS = int(os.environ.get('GEMINI_STREAM_FIRST_MIN_CHARS', 60))
+GEMINI_STREAM_MIN_CHARS = int(os.environ.get('GEMINI_STREAM_MIN_CHARS', 300))
+
+# Fin de una sección: una línea en blanco o un salto de línea antes de una viñeta o un número de lista
+SECTION_BOUNDARY_REGEX = re.compile(r'\n[ \t]*\n|\n(?=[ \t]*(?:[•🔹\-*]|\d+\.)[ \t])')
+
+# Límites (ms) de los intervalos del histograma de latencias
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+class GeminiError(Exception):
+    """La API de Gemini respondió con error (o no respondió) después de los reintentos"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LatencyHistogram:
+    """Histograma de latencias con intervalos fijos; los percentiles son el límite del intervalo"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, elapsed_ms)] += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction):
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+        seen = 0
+        for position, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= fraction * count:
+                return self.buckets[position] if position < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def stats(self):
+        count = sum(self.counts)
+        labels = [f'<={bucket}' for bucket in self.buckets] + [f'>{self.buckets[-1]}']
+        return {
+            "count": count,
+            "avg_ms": round(self.total_ms / count, 1) if count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {label: bucket_count for label, bucket_count in zip(labels, self.counts) if bucket_count}
+        }
+
+
+class GeminiClient:
+    """
+    Cliente de la API de Gemini compartido por todo el proceso.
+
+    Usa una requests.Session con un pool de conexiones keep-alive, así que las consultas
+    seguidas reutilizan la conexión TLS en lugar de abrir una nueva cada vez. Las
+    respuestas 429/5xx y los errores de red se reintentan con espera exponencial
+    aleatoria (respetando Retry-After si viene), y la latencia de cada llamada, con sus
+    reintentos, se acumula en un histograma por método.
+    """
+
+    def __init__(self, api_key=GEMINI_API_KEY, model=GEMINI_MODEL, base_url=GEMINI_BASE_URL,
+                 connect_timeout=GEMINI_CONNECT_TIMEOUT, read_timeout=GEMINI_READ_TIMEOUT,
+                 pool_maxsize=GEMINI_POOL_MAXSIZE, max_retries=GEMINI_MAX_RETRIES,
+                 backoff_base=GEMINI_BACKOFF_BASE, backoff_max=GEMINI_BACKOFF_MAX):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        # Los reintentos los decide _post; el adaptador solo mantiene las conexiones abiertas
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # La clave va en una cabecera y no en la URL, que aparece en los mensajes de error
+        self.session.headers.update({'Content-Type': 'application/json', 'x-goog-api-key': api_key})
+        self.latencies = {}
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def url(self, method):
+        return f'{self.base_url}/models/{self.model}:{method}'
+
+    def _histogram(self, method):
+        histogram = self.latencies.get(method)
+        if histogram is None:
+            with self._lock:
+                histogram = self.latencies.setdefault(method, LatencyHistogram())
+        return histogram
+
+    def _backoff(self, attempt, response=None):
+        """Segundos de espera antes del reintento número attempt (empezando en 0)"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _post(self, method, payload, params=None, stream=False):
+        """
+        Envía la petición y devuelve la respuesta 200, reintentando los errores transitorios.
+        Con stream=True el cuerpo queda sin leer y hay que cerrar la respuesta al terminar.
+        """
+        if not self.api_key:
+            raise GeminiError('Falta la clave de la API de Gemini: define la variable de entorno GEMINI_API_KEY')
+        start = time.perf_counter()
+        self.calls += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = self.session.post(self.url(method), params=params, json=payload,
+                                                 timeout=self.timeout, stream=stream)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if last_attempt:
+                        self.failures += 1
+                        raise GeminiError(f'Error de red al llamar a Gemini: {e}') from e
+                    delay = self._backoff(attempt)
+                    print(f'⚠️ Error de red con Gemini ({e.__class__.__name__}), reintento en {delay:.2f}s')
+                else:
+                    if response.status_code == 200:
+                        return response
+                    if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                        self.failures += 1
+                        text = response.text
+                        response.close()
+                        raise GeminiError(f'{response.status_code} - {text}', response.status_code)
+                    delay = self._backoff(attempt, response)
+                    response.close()
+                    print(f'⚠️ Gemini respondió {response.status_code}, reintento en {delay:.2f}s')
+                self.retries += 1
+                time.sleep(delay)
+        finally:
+            self._histogram(method).observe((time.perf_counter() - start) * 1000)
+
+    def generate_content(self, payload):
+        """Llama a generateContent y devuelve la respuesta JSON"""
+        return self._post('generateContent', payload).json()
+
+    def stream_generate_content(self, payload):
+        """
+        Llama a streamGenerateContent (SSE) y genera los fragmentos de texto a medida que llegan.
+        Los errores de red a mitad de la respuesta se convierten en GeminiError.
+        """
+        method = 'streamGenerateContent'
+        start = time.perf_counter()
+        response = self._post(method, payload, params={'alt': 'sse'}, stream=True)
+        # text/event-stream no indica charset: sin esto iter_lines devolvería bytes
+        response.encoding = 'utf-8'
+        first_text = True
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                text = candidate_text(json.loads(line[len('data:'):]))
+                if text:
+                    if first_text:
+                        self._histogram(f'{method}:primer_texto').observe((time.perf_counter() - start) * 1000)
+                        first_text = False
+                    yield text
+        except requests.RequestException as e:
+            self.failures += 1
+            raise GeminiError(f'Se interrumpió la respuesta de Gemini: {e}') from e
+        except ValueError as e:
+            self.failures += 1
+            raise GeminiError(f'Evento SSE de Gemini no válido: {e}') from e
+        finally:
+            response.close()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "latency": {method: histogram.stats() for method, histogram in self.latencies.items()}
+        }
+
+
+def candidate_text(response_data):
+    """Texto de la primera respuesta candidata (vacío si el evento no trae texto)"""
+    candidates = response_data.get('candidates') or [{}]
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    return ''.join(part.get('text', '') for part in parts)
+
+
+class SectionSplitter:
+    """
+    Corta en secciones completas el texto que llega por fragmentos.
+
+    Una sección termina en una línea en blanco o antes de una viñeta; las secciones se
+    agrupan hasta reunir min_chars caracteres (first_min_chars la primera, para enviarla
+    cuanto antes) y el resto sale con finish(). text acumula la respuesta completa.
+    """
+
+    def __init__(self, first_min_chars=GEMINI_STREAM_FIRST_MIN_CHARS, min_chars=GEMINI_STREAM_MIN_CHARS):
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.text = ''
+        self.sections = 0
+        self._buffer = ''
+        self._pending = ''
+
+    def feed(self, fragment):
+        """Añade un fragmento y devuelve las secciones que ya se pueden enviar"""
+        self.text += fragment
+        self._buffer += fragment
+        boundary = None
+        for boundary in SECTION_BOUNDARY_REGEX.finditer(self._buffer):
+            pass
+        if boundary is None:
+            return []
+        self._pending += self._buffer[:boundary.end()]
+        self._buffer = self._buffer[boundary.end():]
+        if len(self._pending.strip()) < (self.min_chars if self.sections else self.first_min_chars):
+            return []
+        return self._flush(self._pending)
+
+    def finish(self):
+        """Devuelve lo que queda por enviar al terminar la respuesta"""
+        rest = self._pending + self._buffer
+        self._pending = self._buffer = ''
+        return self._flush(rest)
+
+    def _flush(self, text):
+        self._pending = ''
+        section = text.strip()
+        if not section:
+            return []
+        self.sections += 1
+        return [section]
+
+
+gemini_client = GeminiClient()
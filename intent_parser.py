@@ -0,0 +1,186 @@
+# File: intent_parser.py
+import re
+
+CATEGORIAS = ['laptop', 'computadora', 'pc', 'celular', 'smartphone', 'tablet', 'monitor',
+    'impresora', 'scanner', 'teclado', 'mouse', 'audífono', 'auricular', 'cámara',
+    'disco', 'memoria', 'usb', 'router', 'televisor', 'tv']
+
+PRECIO_REGEX = re.compile(r'(\d+)(?:\s*(?:a|y|hasta|entre|soles?|s\/\.?|dolares?|\$)\s*(\d+)?)?')
+
+PALABRAS_COMUNES = frozenset(['que', 'cual', 'cuales', 'cuanto', 'como', 'donde', 'quien', 'cuando',
+    'hay', 'tiene', 'tengan', 'con', 'sin', 'por', 'para', 'entre', 'los', 'las',
+    'uno', 'una', 'unos', 'unas', 'del', 'desde', 'hasta', 'hacia', 'durante',
+    'mediante', 'según', 'sin', 'sobre', 'tras', 'versus'])
+
+# Palabras antes del precio (en los 15 caracteres previos) que lo convierten en máximo o mínimo,
+# y frases que lo hacen en cualquier parte de la consulta
+PRECIO_MAXIMO_CONTEXTO = ('menos', 'bajo', 'económico', 'barato')
+PRECIO_MAXIMO_FRASES = ('menos de', 'máximo')
+PRECIO_MINIMO_CONTEXTO = ('más', 'encima', 'mayor', 'mínimo')
+PRECIO_MINIMO_FRASES = ('más de', 'mínimo')
+PRECIO_CONTEXTO_CHARS = 15
+
+# Comandos para activar el bot (basta con que aparezcan en el mensaje)
+START_COMMANDS = ['!start', 'hola', 'consulta', 'inicio', 'comenzar', 'ayuda', 'start', 'hi', 'hello']
+
+# Comandos para salir (el mensaje completo)
+EXIT_COMMANDS = frozenset(['salir', 'exit', 'menu', 'volver', 'regresar', 'terminar', 'finalizar', '!menu', '!start'])
+
+# Textos de las respuestas del bot: un mensaje que los contiene es un eco de una respuesta anterior
+# (la indicación para salir del modo consulta se envía sola tras una respuesta por secciones)
+BOT_MARKERS = [
+    "✨ ¡bienvenido", "opción no válida", "información del producto",
+    "📦 *catálogo", "🏷️ *ofertas", "🚚 *información", "🔍 *modo consulta",
+    "para salir de este modo escribe"
+]
+
+
+class PatternMatcher:
+    """
+    Busca a la vez muchos textos fijos dentro de un texto, con todas sus apariciones.
+
+    Los patrones forman un trie que se compila a una sola expresión regular
+    ("m(?:enos(?: de)?|ayor|...)"), de modo que el motor de re recorre el texto una vez
+    en C en lugar de buscar cada patrón por separado. En cada posición la expresión da
+    el patrón más largo que empieza ahí; los patrones que son prefijos suyos también
+    empiezan ahí, así que se añaden sin volver a buscar.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        trie = {}
+        for pattern in self.patterns:
+            node = trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self.regex = re.compile(f'(?=({self._trie_regex(trie)}))')
+        # Patrones que empiezan en la misma posición que cada patrón (él y sus prefijos)
+        self.prefixes = {pattern: [other for other in self.patterns if pattern.startswith(other)]
+                         for pattern in self.patterns}
+
+    @classmethod
+    def _trie_regex(cls, node):
+        branches = [re.escape(char) + cls._trie_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Los cuantificadores son voraces: se prefiere el patrón más largo
+        return f'(?:{body})?' if '' in node else body
+
+    def finditer(self, text):
+        """Genera (posición, patrón) para cada aparición de cada patrón, incluidas las solapadas"""
+        for match in self.regex.finditer(text):
+            for pattern in self.prefixes[match.group(1)]:
+                yield match.start(), pattern
+
+    def found(self, text):
+        """Conjunto de patrones que aparecen en el texto"""
+        found = set()
+        for longest in self.regex.findall(text):
+            found.update(self.prefixes[longest])
+        return found
+
+
+class IntentParser:
+    """
+    Vocabulario de consultas y mensajes compilado una sola vez.
+
+    Las categorías y las palabras de contexto de precio de las consultas comparten un
+    PatternMatcher, igual que los comandos de inicio y las marcas de respuestas del bot de
+    los mensajes, así que cada texto se recorre una sola vez; las palabras comunes y los
+    comandos de salida son frozensets.
+    """
+
+    def __init__(self):
+        self.query_kinds = self._kinds((("categorias", CATEGORIAS),
+                                        ("precio_maximo", PRECIO_MAXIMO_CONTEXTO + PRECIO_MAXIMO_FRASES),
+                                        ("precio_minimo", PRECIO_MINIMO_CONTEXTO + PRECIO_MINIMO_FRASES)))
+        self.query_matcher = PatternMatcher(self.query_kinds)
+        self.message_kinds = self._kinds((("start", START_COMMANDS), ("bot", BOT_MARKERS)))
+        self.message_matcher = PatternMatcher(self.message_kinds)
+        self.category_order = {categoria: position for position, categoria in enumerate(CATEGORIAS)}
+
+    @staticmethod
+    def _kinds(vocabularies):
+        kinds = {}
+        for kind, patterns in vocabularies:
+            for pattern in patterns:
+                kinds.setdefault(pattern, set()).add(kind)
+        return kinds
+
+    def scan(self, text_lower):
+        """Devuelve {tipo: {patrón: [posiciones]}} con el vocabulario de consultas presente en el texto"""
+        found = {}
+        for position, pattern in self.query_matcher.finditer(text_lower):
+            for kind in self.query_kinds[pattern]:
+                found.setdefault(kind, {}).setdefault(pattern, []).append(position)
+        return found
+
+    @staticmethod
+    def _in_context(matches, words, start):
+        # Alguna aparición de las palabras termina dentro de los caracteres previos al precio
+        context_start = max(0, start - PRECIO_CONTEXTO_CHARS)
+        return any(context_start <= position and position + len(word) <= start
+                   for word in words for position in matches.get(word, ()))
+
+    def parse_product_query(self, query):
+        """
+        Extrae de la consulta las palabras clave, las categorías mencionadas y el rango de precios.
+
+        Devuelve un dict con palabras_clave, categorias, min_precio y max_precio.
+        """
+        query_lower = query.lower()
+        found = self.scan(query_lower)
+
+        min_precio = None
+        max_precio = None
+        match_precio = PRECIO_REGEX.search(query_lower)
+
+        if match_precio:
+            precio1 = int(match_precio.group(1))
+            precio2 = int(match_precio.group(2)) if match_precio.group(2) else None
+
+            if precio2 is not None:
+                min_precio = min(precio1, precio2)
+                max_precio = max(precio1, precio2)
+            else:
+                maximo = found.get("precio_maximo", {})
+                minimo = found.get("precio_minimo", {})
+                if self._in_context(maximo, PRECIO_MAXIMO_CONTEXTO, match_precio.start()) or any(frase in maximo for frase in PRECIO_MAXIMO_FRASES):
+                    max_precio = precio1
+                elif self._in_context(minimo, PRECIO_MINIMO_CONTEXTO, match_precio.start()) or any(frase in minimo for frase in PRECIO_MINIMO_FRASES):
+                    min_precio = precio1
+                else:
+                    min_precio = max(0, precio1 - round(precio1 * 0.1))
+                    max_precio = precio1 + round(precio1 * 0.1)
+
+        palabras_clave = [word for word in query_lower.split() if len(word) > 2 and word not in PALABRAS_COMUNES]
+
+        # Las palabras clave son partes de la consulta: una categoría contenida en alguna
+        # de ellas también aparece en la consulta
+        categorias_mencionadas = sorted(found.get("categorias", ()), key=self.category_order.__getitem__)
+
+        return {
+            "palabras_clave": palabras_clave,
+            "categorias": categorias_mencionadas,
+            "min_precio": min_precio,
+            "max_precio": max_precio
+        }
+
+    def classify_message(self, message_text):
+        """Indica si un mensaje de chat es un eco de una respuesta del bot, un comando de inicio o de salida"""
+        text_lower = message_text.lower()
+        kinds = set()
+        for pattern in self.message_matcher.found(text_lower):
+            kinds.update(self.message_kinds[pattern])
+        return {
+            "bot_echo": "bot" in kinds,
+            "start": "start" in kinds,
+            "exit": text_lower in EXIT_COMMANDS
+        }
+
+
+intent_parser = IntentParser()
+parse_product_query = intent_parser.parse_product_query
+classify_message = intent_parser.classify_message
@@ -0,0 +1,141 @@
+# File: prepared_statements.py
+import os
+import re
+import json
+import threading
+
+from psycopg2 import errors
+
+# Usar sentencias preparadas (PREPARE/EXECUTE) para las consultas de productos
+PREPARED_STATEMENTS = os.environ.get('PREPARED_STATEMENTS', '1') == '1'
+
+# Máximo de formas de consulta distintas que se preparan; las demás se ejecutan sin preparar
+PREPARED_MAX_SHAPES = int(os.environ.get('PREPARED_MAX_SHAPES', 64))
+
+NAMED_PARAM_REGEX = re.compile(r'%\((\w+)\)s')
+
+
+class QueryShape:
+    """Una consulta con parámetros con nombre convertida a PREPARE ... AS ... $1, $2"""
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.param_names = list(dict.fromkeys(NAMED_PARAM_REGEX.findall(sql)))
+        positions = {param: position for position, param in enumerate(self.param_names, 1)}
+        # PREPARE se envía sin parámetros, así que psycopg2 no convierte %% en %
+        body = NAMED_PARAM_REGEX.sub(lambda match: f'${positions[match.group(1)]}', sql).replace('%%', '%')
+        self.prepare_sql = f'PREPARE {name} AS {body}'
+        self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(self.param_names))})" if self.param_names else f'EXECUTE {name}'
+        self.executions = 0
+
+    def args(self, params):
+        return [params[param] for param in self.param_names]
+
+
+class StatementRegistry:
+    """
+    Registro de las formas de consulta de productos preparadas en el servidor.
+
+    La forma de una consulta es su texto con parámetros con nombre: como las palabras y
+    categorías van en arrays, solo hay unas pocas formas (precio, palabras, categorías,
+    combinaciones, con o sin límite). Cada forma se prepara una vez por conexión, la
+    primera vez que se usa en ella, y después se ejecuta con EXECUTE, de modo que
+    PostgreSQL no analiza la consulta cada vez y puede reutilizar el plan.
+
+    Las conexiones se identifican por (id(conn), pid del backend): si el pool reemplaza
+    una conexión rota, el nuevo backend no tiene las sentencias y se vuelven a preparar.
+    """
+
+    def __init__(self, max_shapes=PREPARED_MAX_SHAPES, enabled=PREPARED_STATEMENTS):
+        self.max_shapes = max_shapes
+        self.enabled = enabled
+        self.shapes = {}
+        self._prepared = {}
+        self._lock = threading.Lock()
+        self.prepares = 0
+        self.unprepared = 0
+
+    def shape(self, sql):
+        """Devuelve la forma registrada para la consulta, o None si ya no caben más"""
+        shape = self.shapes.get(sql)
+        if shape is None:
+            with self._lock:
+                shape = self.shapes.get(sql)
+                if shape is None and len(self.shapes) < self.max_shapes:
+                    shape = QueryShape(f'productos_q{len(self.shapes) + 1}', sql)
+                    self.shapes[sql] = shape
+        return shape
+
+    def _connection_key(self, conn):
+        return id(conn), conn.get_backend_pid()
+
+    def _ensure_prepared(self, cur, shape):
+        key = self._connection_key(cur.connection)
+        prepared = self._prepared.setdefault(key, set())
+        if shape.name not in prepared:
+            cur.execute(shape.prepare_sql)
+            prepared.add(shape.name)
+            self.prepares += 1
+
+    def execute(self, cur, sql, params, setup=()):
+        """
+        Ejecuta la consulta (con parámetros con nombre) como sentencia preparada si es posible.
+
+        setup son sentencias (sql, params) que se ejecutan antes en la misma transacción,
+        p. ej. set_config(..., true); se repiten si hay que reintentar.
+        """
+        for setup_sql, setup_params in setup:
+            cur.execute(setup_sql, setup_params)
+
+        shape = self.shape(sql) if self.enabled else None
+        if shape is None:
+            self.unprepared += 1
+            cur.execute(sql, params)
+            return
+
+        self._ensure_prepared(cur, shape)
+        try:
+            cur.execute(shape.execute_sql, shape.args(params))
+        except errors.InvalidSqlStatementName:
+            # El servidor perdió las sentencias (DISCARD ALL, pooler externo...): se preparan de nuevo
+            cur.connection.rollback()
+            self.forget_connection(cur.connection)
+            for setup_sql, setup_params in setup:
+                cur.execute(setup_sql, setup_params)
+            self._ensure_prepared(cur, shape)
+            cur.execute(shape.execute_sql, shape.args(params))
+        shape.executions += 1
+
+    def forget_connection(self, conn):
+        """Olvida las sentencias de una conexión (p. ej. tras DISCARD ALL o al cerrarla)"""
+        self._prepared.pop(self._connection_key(conn), None)
+
+    def explain(self, cur, sql, params, prepared=True):
+        """
+        Ejecuta la consulta con EXPLAIN (ANALYZE) y devuelve los tiempos de planificación
+        y ejecución en milisegundos, para comparar la consulta preparada con la normal.
+        """
+        shape = self.shape(sql) if prepared else None
+        if shape is not None:
+            self._ensure_prepared(cur, shape)
+            cur.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {shape.execute_sql}', shape.args(params))
+        else:
+            cur.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params)
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {
+            "planning_ms": plan[0].get("Planning Time", 0.0),
+            "execution_ms": plan[0].get("Execution Time", 0.0)
+        }
+
+    def stats(self):
+        return {
+            "shapes": len(self.shapes),
+            "prepares": self.prepares,
+            "executions": sum(shape.executions for shape in self.shapes.values()),
+            "unprepared": self.unprepared
+        }
+
+
+statement_registry = StatementRegistry()
@@ -0,0 +1,309 @@
+# File: product_mirror.py
+import os
+import sys
+import time
+import select
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import islice
+
+import psycopg2
+
+from db_pool import db_pool, get_connection_settings
+from product_search import (PRODUCT_COLUMNS, PRODUCT_PAGE_SIZE, PRODUCT_SEARCH_BACKEND, TIER_EXACT_PRICE,
+                            TIER_ALL_TERMS, TIER_ANY_TERM, TIER_WIDE_PRICE, price_bounds, needs_keyword_ranking,
+                            rank_by_keywords, make_result, empty_result)
+
+# Copia en memoria de la tabla productos: 'off' (desactivada), 'poll' (se recarga cuando
+# cambia la versión de productos) o 'notify' (se recarga al recibir NOTIFY del trigger
+# creado por db_bootstrap.py notify)
+PRODUCT_MIRROR = os.environ.get('PRODUCT_MIRROR', 'off')
+
+# Canal de LISTEN/NOTIFY usado por el trigger de la tabla productos
+PRODUCT_MIRROR_CHANNEL = 'productos_cambios'
+
+# Segundos de espera antes de reconectar el listener tras un error
+PRODUCT_MIRROR_RECONNECT_DELAY = 5
+
+
+class ProductSnapshot:
+    """
+    Copia inmutable de la tabla productos en estructuras por columnas.
+
+    Las filas se guardan en el orden de la base de datos (precio, codigo), así que un
+    rango de precios es un intervalo contiguo de posiciones y ordenar posiciones equivale
+    a ordenar por precio. Las palabras de codigo/nombre/descripcion/categoria forman un
+    índice palabra -> posiciones: como las palabras clave no contienen espacios,
+    LIKE '%palabra%' sobre una columna equivale a que la palabra clave esté contenida en
+    alguna de sus palabras. Para no recorrer todo el vocabulario con cada palabra clave,
+    un índice de trigramas da las palabras candidatas que contienen todos sus trigramas.
+    """
+
+    def __init__(self, rows):
+        columns = {column: position for position, column in enumerate(PRODUCT_COLUMNS)}
+        self.codigos = [row[columns['codigo']] for row in rows]
+        self.nombres = [row[columns['nombre']] for row in rows]
+        self.descripciones = [row[columns['descripcion']] for row in rows]
+        self.imagenes = [row[columns['imagen_url']] for row in rows]
+        # Pocas categorías distintas repetidas en miles de filas: se comparten
+        self.categorias = [sys.intern(row[columns['categoria']]) if isinstance(row[columns['categoria']], str)
+                           else row[columns['categoria']] for row in rows]
+
+        # Valores originales para devolverlos tal cual (p. ej. Decimal) y floats para buscar;
+        # los precios NULL quedan al final (NULLS LAST) y no entran en ningún rango
+        self.precio_values = [row[columns['precio']] for row in rows]
+        self.precios = array('d', (float(precio) for precio in self.precio_values if precio is not None))
+
+        stocks = [row[columns['stock']] for row in rows]
+        self.stocks = array('q', stocks) if all(isinstance(stock, int) for stock in stocks) else stocks
+
+        postings = {}
+        for position in range(len(rows)):
+            words = set()
+            for value in (self.codigos[position], self.nombres[position], self.descripciones[position], self.categorias[position]):
+                if value:
+                    words.update(str(value).lower().split())
+            for word in words:
+                postings.setdefault(word, array('I')).append(position)
+        self.postings = postings
+
+        # Trigrama -> índices en vocabulary de las palabras que lo contienen
+        self.vocabulary = list(postings)
+        trigrams = {}
+        for index, word in enumerate(self.vocabulary):
+            for trigram in {word[start:start + 3] for start in range(len(word) - 2)}:
+                trigrams.setdefault(trigram, array('I')).append(index)
+        self.trigrams = trigrams
+
+        category_rows = {}
+        for position, categoria in enumerate(self.categorias):
+            if categoria:
+                category_rows.setdefault(categoria.lower(), array('I')).append(position)
+        self.category_rows = category_rows
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def row(self, position):
+        return (self.codigos[position], self.nombres[position], self.descripciones[position],
+                self.precio_values[position], self.stocks[position], self.categorias[position],
+                self.imagenes[position])
+
+    def _matching_words(self, palabra):
+        """Palabras del vocabulario que contienen palabra"""
+        if len(palabra) < 3:
+            return [word for word in self.postings if palabra in word]
+        # Se parte del trigrama menos frecuente y se comprueba la subcadena completa
+        candidates = min((self.trigrams.get(palabra[start:start + 3], ()) for start in range(len(palabra) - 2)), key=len)
+        return [word for word in map(self.vocabulary.__getitem__, candidates) if palabra in word]
+
+    def _keyword_rows(self, palabras):
+        rows = set()
+        for palabra in palabras:
+            for word in self._matching_words(palabra):
+                rows.update(self.postings[word])
+        return rows
+
+    def _category_rows(self, categorias):
+        rows = set()
+        for categoria in categorias:
+            for value, positions in self.category_rows.items():
+                if categoria in value:
+                    rows.update(positions)
+        return rows
+
+    def _price_interval(self, low, high):
+        start = bisect_left(self.precios, low) if low is not None else 0
+        end = bisect_right(self.precios, high) if high is not None else len(self.precios)
+        return start, max(start, end)
+
+    def _tiers(self, intent):
+        """
+        Genera (nivel, intervalos, posiciones sueltas) para cada nivel de búsqueda, con la
+        misma lógica que build_tiered_query; el resultado de un nivel son las posiciones
+        de los intervalos más las posiciones sueltas, sin solaparse.
+        """
+        min_precio = intent["min_precio"]
+        max_precio = intent["max_precio"]
+        has_price = min_precio is not None or max_precio is not None
+
+        if has_price:
+            yield TIER_EXACT_PRICE, [self._price_interval(*price_bounds(min_precio, max_precio, 0))], []
+
+        # Condiciones de los niveles 2 y 3: conjuntos de posiciones o intervalos de precio
+        sets = []
+        if intent["palabras_clave"]:
+            sets.append(self._keyword_rows(intent["palabras_clave"]))
+        if intent["categorias"]:
+            sets.append(self._category_rows(intent["categorias"]))
+        low, high = price_bounds(min_precio, max_precio, 0.05)
+        intervals = []
+        if low is not None:
+            intervals.append(self._price_interval(low, None))
+        if high is not None:
+            intervals.append(self._price_interval(None, high))
+
+        start, end = max((i[0] for i in intervals), default=0), min((i[1] for i in intervals), default=len(self))
+        if sets:
+            rows = set.intersection(*sets)
+            yield TIER_ALL_TERMS, [], sorted(row for row in rows if start <= row < end)
+        elif intervals:
+            yield TIER_ALL_TERMS, [(start, max(start, end))], []
+
+        if len(sets) + len(intervals) > 1:
+            merged = []
+            for interval_start, interval_end in sorted(intervals):
+                if merged and interval_start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], interval_end))
+                elif interval_start < interval_end:
+                    merged.append((interval_start, interval_end))
+            loose = set().union(*sets) if sets else set()
+            yield TIER_ANY_TERM, merged, sorted(row for row in loose
+                                                if not any(a <= row < b for a, b in merged))
+
+        if has_price:
+            yield TIER_WIDE_PRICE, [self._price_interval(*price_bounds(min_precio, max_precio, 0.15))], []
+
+    def search(self, intent, limit=PRODUCT_PAGE_SIZE, offset=0):
+        """Misma búsqueda por niveles que search_products con el backend 'like', sin base de datos"""
+        for tier, intervals, loose in self._tiers(intent):
+            total = sum(end - start for start, end in intervals) + len(loose)
+            if not total:
+                continue
+
+            positions = merge(*(range(start, end) for start, end in intervals), loose)
+            if tier == TIER_EXACT_PRICE and needs_keyword_ranking(intent):
+                rows = rank_by_keywords([self.row(position) for position in positions], intent)
+                rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+            else:
+                stop = None if limit is None else offset + limit
+                rows = [self.row(position) for position in islice(positions, offset, stop)]
+            if not rows:
+                # Ventana más allá del final: igual que la consulta SQL, que no devuelve filas
+                return empty_result()
+            return make_result(tier, rows, total)
+
+        return empty_result()
+
+
+class ProductMirror:
+    """
+    Réplica en memoria de productos que responde las búsquedas sin consultar la base de datos.
+
+    La copia se reemplaza entera (ProductSnapshot) al recargar, así que las búsquedas en
+    curso nunca ven una tabla a medio cargar. Se mantiene al día con LISTEN/NOTIFY
+    (mode='notify') o comparando la versión de productos que se le pasa (mode='poll').
+    """
+
+    def __init__(self, mode=PRODUCT_MIRROR):
+        if mode not in ('poll', 'notify'):
+            raise ValueError(f"Modo de réplica de productos desconocido: {mode}")
+        self.mode = mode
+        self.snapshot = None
+        self.version = None
+        self.loads = 0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def load(self):
+        """Lee la tabla productos y reemplaza la copia en memoria"""
+        with self._lock:
+            return self._load()
+
+    def _load(self):
+        self._stale = False
+        start = time.perf_counter()
+        try:
+            with db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute(f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM productos "
+                            f"ORDER BY precio ASC NULLS LAST, codigo ASC")
+                rows = cur.fetchall()
+        except Exception:
+            self._stale = True
+            raise
+        self.snapshot = ProductSnapshot(rows)
+        self.loads += 1
+        print(f'🪞 Réplica de productos cargada: {len(rows)} filas en {time.perf_counter() - start:.2f}s')
+        return self.snapshot
+
+    def mark_stale(self):
+        self._stale = True
+
+    def sync_version(self, version):
+        """Marca la copia como desactualizada si cambió la versión de productos (modo 'poll')"""
+        if version is None or not isinstance(version, tuple):
+            return
+        if self.version is not None and version != self.version:
+            print('♻️ La tabla productos cambió: se recargará la réplica en memoria')
+            self._stale = True
+        self.version = version
+
+    def current(self):
+        """Copia vigente; la (re)carga si aún no existe o quedó desactualizada"""
+        snapshot = self.snapshot
+        if snapshot is not None and not self._stale:
+            return snapshot
+        with self._lock:
+            # Otro hilo pudo recargarla mientras se esperaba el lock
+            if self.snapshot is None or self._stale:
+                return self._load()
+            return self.snapshot
+
+    def search(self, intent, limit=PRODUCT_PAGE_SIZE, offset=0):
+        return self.current().search(intent, limit, offset)
+
+    def start_listener(self):
+        """Arranca (una sola vez) el hilo que escucha las notificaciones del trigger"""
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name='productos-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        # LISTEN necesita una conexión propia durante toda la vida del hilo, fuera del pool
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**get_connection_settings())
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN {PRODUCT_MIRROR_CHANNEL}')
+                print(f'👂 Escuchando cambios de productos en el canal {PRODUCT_MIRROR_CHANNEL}')
+                # Pudo haber cambios mientras no se escuchaba
+                self.load()
+
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.load()
+            except Exception as e:
+                print(f'⚠️ Error en el listener de productos: {e}. Reintentando en {PRODUCT_MIRROR_RECONNECT_DELAY}s')
+                self._stale = True
+                time.sleep(PRODUCT_MIRROR_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_product_mirror = None
+_product_mirror_lock = threading.Lock()
+
+
+def get_product_mirror():
+    """Devuelve la réplica de productos del proceso, o None si PRODUCT_MIRROR=off"""
+    global _product_mirror
+    if PRODUCT_MIRROR == 'off':
+        return None
+    with _product_mirror_lock:
+        if _product_mirror is None:
+            if PRODUCT_SEARCH_BACKEND != 'like':
+                print(f"⚠️ La réplica de productos busca como el backend 'like' (PRODUCT_SEARCH_BACKEND={PRODUCT_SEARCH_BACKEND})")
+            _product_mirror = ProductMirror(PRODUCT_MIRROR)
+            if _product_mirror.mode == 'notify':
+                _product_mirror.start_listener()
+        return _product_mirror
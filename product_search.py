@@ -0,0 +1,410 @@
+# File: product_search.py
+import os
+import re
+
+from prepared_statements import statement_registry
+from intent_parser import parse_product_query
+
+# Cómo se buscan las palabras clave: 'like' (LIKE sobre cada columna, sin índice),
+# 'fts' (columna tsvector con índice GIN; requiere ejecutar antes db_bootstrap.py fts) o
+# 'trigram' (similitud de trigramas con pg_trgm, tolera errores de escritura;
+# requiere db_bootstrap.py trigram)
+PRODUCT_SEARCH_BACKEND = os.environ.get('PRODUCT_SEARCH_BACKEND', 'like')
+
+# Configuración de texto de PostgreSQL usada por el backend 'fts'
+FTS_CONFIG = 'spanish'
+
+# Peso de la columna categoria en el tsvector busqueda (db_bootstrap.py)
+FTS_CATEGORY_WEIGHT = 'B'
+
+# Similitud mínima (0-1) entre una palabra de la consulta y alguna palabra de la columna
+# para el backend 'trigram' ("lapto" frente a "laptop" ≈ 0.67)
+TRGM_WORD_SIMILARITY_THRESHOLD = float(os.environ.get('TRGM_WORD_SIMILARITY_THRESHOLD', 0.5))
+
+# Columnas comparadas por trigramas (cada una con su índice GIN gin_trgm_ops)
+TRGM_COLUMNS = ('nombre', 'descripcion', 'categoria', 'codigo')
+
+# Productos devueltos por búsqueda si no se indica otro límite
+PRODUCT_PAGE_SIZE = int(os.environ.get('PRODUCT_PAGE_SIZE', 5))
+
+# Columnas devueltas para cada producto, en el orden de las filas
+PRODUCT_COLUMNS = ('codigo', 'nombre', 'descripcion', 'precio', 'stock', 'categoria', 'imagen_url')
+
+TSQUERY_TOKEN_REGEX = re.compile(r'\w+')
+
+# Peso de cada columna cuando contiene una palabra clave (cuenta la mejor columna de cada
+# palabra) y peso de cada categoría mencionada que coincide, para ordenar el nivel de precio exacto
+KEYWORD_WEIGHTS = (('codigo', 3), ('nombre', 3), ('categoria', 2), ('descripcion', 1))
+CATEGORY_WEIGHT = 2
+
+# Niveles de búsqueda, del más estricto al más amplio, con el mensaje de cada uno
+TIER_EXACT_PRICE = 1
+TIER_ALL_TERMS = 2
+TIER_ANY_TERM = 3
+TIER_WIDE_PRICE = 4
+
+TIER_MESSAGES = {
+    TIER_EXACT_PRICE: "Se encontraron {count} productos en el rango de precio solicitado",
+    TIER_ALL_TERMS: "Se encontraron {count} productos relacionados",
+    TIER_ANY_TERM: "Se encontraron {count} productos relacionados (búsqueda ampliada)",
+    TIER_WIDE_PRICE: "Se encontraron {count} productos en un rango de precio similar (±15%)",
+}
+
+
+def intent_key(intent, backend=PRODUCT_SEARCH_BACKEND, limit=PRODUCT_PAGE_SIZE, offset=0):
+    """
+    Clave de caché de una búsqueda: consultas escritas de forma distinta con las mismas
+    palabras, categorías y precios comparten resultado. El orden de las palabras no
+    cambia el resultado, pero las repetidas sí (suman relevancia), así que se conservan.
+    """
+    return (backend, tuple(sorted(intent["palabras_clave"])), tuple(sorted(intent["categorias"])),
+            intent["min_precio"], intent["max_precio"], limit, offset)
+
+
+def has_search_terms(intent):
+    return bool(intent["palabras_clave"] or intent["categorias"]
+                or intent["min_precio"] is not None or intent["max_precio"] is not None)
+
+
+def price_bounds(min_precio, max_precio, margin):
+    """Límites del rango de precio ampliado en el margen indicado (0.05 = ±5%); None = sin límite"""
+    low = max(0, min_precio - round(min_precio * margin)) if min_precio is not None else None
+    high = max_precio + round(max_precio * margin) if max_precio is not None else None
+    return low, high
+
+
+def _price_condition(min_precio, max_precio, margin, params, name):
+    """Condición SQL del rango de precio ampliado en el margen indicado (parámetros name_min/name_max)"""
+    low, high = price_bounds(min_precio, max_precio, margin)
+    conditions = []
+    if low is not None:
+        conditions.append(f'precio >= %({name}_min)s')
+        params[f'{name}_min'] = low
+    if high is not None:
+        conditions.append(f'precio <= %({name}_max)s')
+        params[f'{name}_max'] = high
+    return ' AND '.join(conditions)
+
+
+def _like_patterns(words):
+    return [f'%{word}%' for word in words]
+
+
+def _like_conditions(intent, params):
+    """
+    Palabras clave y categorías con LIKE '%palabra%' sobre cada columna (sin índice).
+
+    Las palabras se pasan como array (LIKE ANY), así que el texto de la consulta no
+    depende de cuántas haya.
+    """
+    conditions = []
+
+    if intent["palabras_clave"]:
+        conditions.append("""(
+                    LOWER(codigo) LIKE ANY(%(patrones_palabras)s::text[]) OR
+                    LOWER(nombre) LIKE ANY(%(patrones_palabras)s::text[]) OR
+                    LOWER(descripcion) LIKE ANY(%(patrones_palabras)s::text[]) OR
+                    LOWER(categoria) LIKE ANY(%(patrones_palabras)s::text[])
+                )""")
+        params['patrones_palabras'] = _like_patterns(intent["palabras_clave"])
+
+    if intent["categorias"]:
+        conditions.append('LOWER(categoria) LIKE ANY(%(patrones_categorias)s::text[])')
+        params['patrones_categorias'] = _like_patterns(intent["categorias"])
+
+    return conditions
+
+
+def _prefix_tsquery(words, weights=''):
+    """
+    Texto para to_tsquery que acepta cualquiera de las palabras como prefijo ("lap" -> "lap:*"),
+    solo en las partes del tsvector con los pesos indicados ("lap:*B") si se dan
+    """
+    tokens = [token for word in words for token in TSQUERY_TOKEN_REGEX.findall(word)]
+    return ' | '.join(f'{token}:*{weights}' for token in dict.fromkeys(tokens))
+
+
+def _fts_conditions(intent, params):
+    """
+    Palabras clave y categorías buscadas en la columna busqueda (tsvector con índice GIN).
+
+    Las categorías, como con LIKE, solo se buscan en la columna categoria, que es la
+    única con peso B en busqueda (db_bootstrap.py).
+    """
+    conditions = []
+
+    for name, words, weights in (('palabras', intent["palabras_clave"], ''),
+                                 ('categorias', intent["categorias"], FTS_CATEGORY_WEIGHT)):
+        query_text = _prefix_tsquery(words, weights)
+        if query_text:
+            conditions.append(f"busqueda @@ to_tsquery('{FTS_CONFIG}', f_unaccent(%({name})s))")
+            params[name] = query_text
+
+    return conditions
+
+
+def _fts_rank(intent, params):
+    query_text = _prefix_tsquery(intent["palabras_clave"] + intent["categorias"])
+    if not query_text:
+        return None
+    params['relevancia'] = query_text
+    return f"ts_rank(busqueda, to_tsquery('{FTS_CONFIG}', f_unaccent(%(relevancia)s)))"
+
+
+def trgm_column_expression(column):
+    # Debe coincidir con la expresión de los índices creados por db_bootstrap.py trigram
+    return f'f_unaccent(LOWER({column}))'
+
+
+def _trgm_words(words):
+    return list(dict.fromkeys(token for word in words for token in TSQUERY_TOKEN_REGEX.findall(word)))
+
+
+def _trigram_conditions(intent, params):
+    """
+    Palabras clave y categorías comparadas por similitud de trigramas.
+
+    "palabra <% columna" es cierto si la palabra se parece lo suficiente a alguna
+    palabra de la columna (pg_trgm.word_similarity_threshold) y puede resolverse con
+    los índices GIN gin_trgm_ops. Cada palabra necesita su propia comparación para que
+    el índice sirva, así que aquí la consulta sí depende del número de palabras.
+    """
+    conditions = []
+
+    for name, words, columns in (('palabra', intent["palabras_clave"], TRGM_COLUMNS),
+                                 ('categoria', intent["categorias"], ('categoria',))):
+        word_conditions = []
+        for position, word in enumerate(_trgm_words(words)):
+            params[f'{name}_{position}'] = word
+            for column in columns:
+                word_conditions.append(f'f_unaccent(%({name}_{position})s) <%% {trgm_column_expression(column)}')
+        if word_conditions:
+            conditions.append(f'({" OR ".join(word_conditions)})')
+
+    return conditions
+
+
+def _trigram_rank(intent, params):
+    words = _trgm_words(intent["palabras_clave"] + intent["categorias"])
+    if not words:
+        return None
+    params['relevancia'] = ' '.join(words)
+    similarities = ', '.join(f'word_similarity(f_unaccent(%(relevancia)s), {trgm_column_expression(column)})' for column in TRGM_COLUMNS)
+    return f'GREATEST({similarities})'
+
+
+# backend -> (condiciones de palabras clave y categorías, expresión de relevancia)
+SEARCH_BACKENDS = {
+    'like': (_like_conditions, None),
+    'fts': (_fts_conditions, _fts_rank),
+    'trigram': (_trigram_conditions, _trigram_rank),
+}
+
+
+def _term_conditions(intent, backend, params):
+    """Condiciones de palabras clave, categorías y precio (±5%) que se combinan en los niveles 2 y 3"""
+    conditions = SEARCH_BACKENDS[backend][0](intent, params)
+
+    if intent["min_precio"] is not None:
+        conditions.append(_price_condition(intent["min_precio"], None, 0.05, params, 'cercano'))
+    if intent["max_precio"] is not None:
+        conditions.append(_price_condition(None, intent["max_precio"], 0.05, params, 'cercano'))
+
+    return conditions
+
+
+def needs_keyword_ranking(intent):
+    """El nivel de precio exacto se ordena por relevancia de palabras clave y categorías"""
+    has_price = intent["min_precio"] is not None or intent["max_precio"] is not None
+    return has_price and bool(intent["palabras_clave"] or intent["categorias"])
+
+
+def _keyword_relevance(intent, params):
+    """
+    Expresión SQL de relevancia: por cada palabra clave, el peso de la mejor columna que la
+    contiene (KEYWORD_WEIGHTS), más CATEGORY_WEIGHT por cada categoría mencionada que
+    coincide con la categoría del producto. Es la misma puntuación que keyword_score.
+    """
+    parts = []
+    if intent["palabras_clave"]:
+        params['patrones_palabras'] = _like_patterns(intent["palabras_clave"])
+        weights = ', '.join(f'CASE WHEN LOWER({column}) LIKE patron THEN {weight} ELSE 0 END'
+                            for column, weight in KEYWORD_WEIGHTS)
+        parts.append(f'(SELECT COALESCE(SUM(GREATEST({weights})), 0) FROM unnest(%(patrones_palabras)s::text[]) AS patron)')
+    if intent["categorias"]:
+        params['patrones_categorias'] = _like_patterns(intent["categorias"])
+        parts.append(f'(SELECT {CATEGORY_WEIGHT} * COUNT(*) FROM unnest(%(patrones_categorias)s::text[]) AS patron '
+                     f'WHERE LOWER(categoria) LIKE patron)')
+    return ' + '.join(parts)
+
+
+def build_tiered_query(intent, backend=PRODUCT_SEARCH_BACKEND, limit=None, offset=0):
+    """
+    Construye una única consulta que resuelve todos los niveles de búsqueda.
+
+    Cada fila recibe con CASE el nivel más estricto que cumple:
+      1. rango de precio exacto,
+      2. palabras clave AND categorías AND precio ±5%,
+      3. cualquiera de esas condiciones (OR),
+      4. rango de precio ±15%.
+    Se devuelven solo las filas del mejor nivel encontrado, que es el mismo resultado
+    que ejecutar los niveles uno tras otro pero en un solo viaje a la base de datos y
+    recorriendo la tabla una vez.
+
+    Cada fila lleva el total de filas del nivel (COUNT(*) OVER, calculado antes del
+    LIMIT) para poder devolver solo la ventana limit/offset sin una segunda consulta.
+
+    Con los backends indexados ('fts' y 'trigram') se añade un filtro previo que el
+    planificador puede resolver con los índices y, dentro del nivel, los productos se
+    ordenan por relevancia (ts_rank o similitud de trigramas) antes que por precio.
+
+    Si la consulta tiene precio y palabras clave o categorías, el nivel de precio exacto
+    se ordena primero por la relevancia de _keyword_relevance (0 en los demás niveles),
+    de modo que el LIMIT ya devuelve los productos más relevantes.
+
+    Los parámetros tienen nombre (%(nombre)s) y cada uno aparece una sola vez en el
+    dict aunque la condición se repita en varios niveles. Con los backends 'like' y
+    'fts' el texto de la consulta solo depende de qué partes tiene la consulta
+    (palabras, categorías, precio mínimo/máximo, límite), no de sus valores.
+    Devuelve (sql, params).
+    """
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Backend de búsqueda de productos desconocido: {backend}")
+
+    min_precio = intent["min_precio"]
+    max_precio = intent["max_precio"]
+    has_price = min_precio is not None or max_precio is not None
+
+    params = {}
+    tiers = []
+    if has_price:
+        tiers.append((TIER_EXACT_PRICE, _price_condition(min_precio, max_precio, 0, params, 'exacto')))
+
+    conditions = _term_conditions(intent, backend, params)
+    if conditions:
+        tiers.append((TIER_ALL_TERMS, ' AND '.join(conditions)))
+        if len(conditions) > 1:
+            tiers.append((TIER_ANY_TERM, ' OR '.join(conditions)))
+    elif not has_price:
+        # Ninguna palabra tiene caracteres buscables
+        tiers.append((TIER_ALL_TERMS, 'FALSE'))
+
+    if has_price:
+        tiers.append((TIER_WIDE_PRICE, _price_condition(min_precio, max_precio, 0.15, params, 'amplio')))
+
+    cases = '\n'.join(f'                WHEN {condition} THEN {tier}' for tier, condition in tiers)
+
+    rank = ''
+    prefilter = ''
+    order_by = 'precio ASC, codigo ASC'
+    rank_expression = SEARCH_BACKENDS[backend][1]
+    if rank_expression is not None:
+        rank_sql = rank_expression(intent, params)
+        if rank_sql:
+            rank = f",\n                    {rank_sql} AS relevancia"
+            order_by = 'relevancia DESC, ' + order_by
+
+        # El último nivel de términos y el de precio ±15% contienen a todos los demás,
+        # así que basta con ellos para descartar filas usando los índices
+        widest = [tiers[-1]]
+        if has_price and len(tiers) > 2:
+            widest.insert(0, tiers[-2])
+        prefilter = 'WHERE ' + ' OR '.join(f'({condition})' for _, condition in widest)
+
+    if needs_keyword_ranking(intent):
+        # Se calcula en la consulta exterior, solo para las filas del mejor nivel
+        order_by = (f'CASE WHEN nivel = {TIER_EXACT_PRICE} THEN {_keyword_relevance(intent, params)} ELSE 0 END DESC, '
+                    + order_by)
+
+    columns = ', '.join(PRODUCT_COLUMNS)
+    sql = f"""
+        WITH candidatos AS (
+            SELECT * FROM (
+                SELECT {columns},
+                    CASE
+{cases}
+                    END AS nivel{rank}
+                FROM productos
+                {prefilter}
+            ) clasificados
+            WHERE nivel IS NOT NULL
+        )
+        SELECT {columns}, nivel, COUNT(*) OVER () AS total
+        FROM candidatos
+        WHERE nivel = (SELECT MIN(nivel) FROM candidatos)
+        ORDER BY {order_by}
+    """
+    if limit is not None:
+        sql += '    LIMIT %(limite)s OFFSET %(desde)s\n'
+        params['limite'] = limit
+        params['desde'] = offset
+    return sql, params
+
+
+def row_to_product(row):
+    return dict(zip(PRODUCT_COLUMNS, row))
+
+
+def keyword_score(row, intent):
+    """Versión en Python de _keyword_relevance para una fila en el orden de PRODUCT_COLUMNS"""
+    lower = {column: str(row[PRODUCT_COLUMNS.index(column)] or '').lower() for column, _ in KEYWORD_WEIGHTS}
+    score = sum(max((weight for column, weight in KEYWORD_WEIGHTS if palabra in lower[column]), default=0)
+                for palabra in intent["palabras_clave"])
+    score += sum(CATEGORY_WEIGHT for categoria in intent["categorias"] if categoria in lower['categoria'])
+    return score
+
+
+def rank_by_keywords(rows, intent):
+    """Ordena (de forma estable) las filas por keyword_score, como hace la consulta SQL"""
+    return sorted(rows, key=lambda row: keyword_score(row, intent), reverse=True)
+
+
+def search_products(cur, intent, backend=PRODUCT_SEARCH_BACKEND, limit=PRODUCT_PAGE_SIZE, offset=0):
+    """
+    Ejecuta la búsqueda por niveles y devuelve el resultado con success/products/total/message.
+
+    products contiene solo la ventana [offset, offset + limit) del mejor nivel (todo el
+    nivel si limit es None) y total el número de productos del nivel.
+    """
+    sql, params = build_tiered_query(intent, backend, limit, offset)
+
+    setup = []
+    if backend == 'trigram':
+        # Solo para esta transacción; la conexión vuelve al pool con rollback
+        setup.append(("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                      [str(TRGM_WORD_SIMILARITY_THRESHOLD)]))
+
+    print('🔍 Ejecutando búsqueda por niveles en una sola consulta:')
+    print('Query:', sql)
+    print('Params:', params)
+
+    statement_registry.execute(cur, sql, params, setup)
+    rows = cur.fetchall()
+
+    if not rows:
+        return empty_result()
+
+    tier, total = rows[0][-2], rows[0][-1]
+    return make_result(tier, [row[:-2] for row in rows], total)
+
+
+def empty_result():
+    print('⚠️ No se encontraron productos en ningún nivel de búsqueda')
+    return {
+        "success": False,
+        "products": [],
+        "total": 0,
+        "message": "No se encontraron productos que coincidan con tu búsqueda"
+    }
+
+
+def make_result(tier, rows, total):
+    """Resultado con success/products/total/message a partir de las filas de la ventana"""
+    products = [row_to_product(row) for row in rows]
+    print(f'✅ Encontrados {total} productos (nivel {tier}), devolviendo {len(products)}')
+    return {
+        "success": True,
+        "products": products,
+        "total": total,
+        "message": TIER_MESSAGES[tier].format(count=total)
+    }
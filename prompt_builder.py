@@ -0,0 +1,250 @@
+# File: prompt_builder.py
+import os
+import re
+
+from catalog_index import CHARS_PER_TOKEN
+
+# Tokens aproximados (CHARS_PER_TOKEN caracteres por token) disponibles para el contexto de
+# productos y del catálogo PDF en cada consulta a Gemini
+GEMINI_CONTEXT_TOKEN_BUDGET = int(os.environ.get('GEMINI_CONTEXT_TOKEN_BUDGET', 1200))
+
+# Productos como máximo en el contexto y caracteres máximos de cada descripción
+PROMPT_MAX_PRODUCTS = 5
+PROMPT_DESCRIPTION_MAX_CHARS = int(os.environ.get('PROMPT_DESCRIPTION_MAX_CHARS', 300))
+
+# Se descartan los fragmentos del PDF con puntuación nula o menor que esta fracción de la mejor
+PROMPT_MIN_CHUNK_SCORE_RATIO = float(os.environ.get('PROMPT_MIN_CHUNK_SCORE_RATIO', 0.2))
+
+# Un fragmento que no cabe entero se recorta solo si aún quedan estos tokens libres
+PROMPT_MIN_TRUNCATED_TOKENS = 40
+
+# Las líneas más cortas no se deduplican (p. ej. "Stock: 5" puede repetirse con otro sentido)
+DEDUPE_MIN_LINE_CHARS = 20
+
+WHITESPACE_REGEX = re.compile(r'\s+')
+
+# Instrucciones fijas: van en systemInstruction y no se repiten en el texto de cada consulta
+SYSTEM_INSTRUCTION = """### OBJETIVO
+Proporcionar una respuesta clara, precisa y estructurada sobre la información solicitada.
+
+### INSTRUCCIONES DE CONTENIDO
+1. Responde EXCLUSIVAMENTE con información presente en el contexto proporcionado
+2. Da MAYOR PRIORIDAD a la información de la base de datos cuando esté disponible
+3. Complementa con información del catálogo PDF si es necesario
+4. Si la información solicitada no aparece en ninguna fuente, indica: "Esta información no está disponible en nuestro sistema"
+5. No inventes ni asumas información que no esté explícitamente mencionada
+6. Mantén SIEMPRE el idioma español en toda la respuesta
+7. Extrae las características técnicas más importantes y omite las secundarias
+8. Identifica el rango de precios cuando se comparan múltiples productos
+9. Destaca la disponibilidad de stock solo cuando sea relevante para la consulta
+10. Prioriza características relevantes según la consulta del usuario
+11. IMPORTANTE: NO incluyas URLs de imágenes en tu respuesta - las enviaremos por separado
+
+### INSTRUCCIONES DE FORMATO
+1. ESTRUCTURA GENERAL:
+   - Inicia con un título claro y descriptivo en negrita relacionado con la consulta
+   - Divide la información en secciones lógicas con subtítulos cuando sea apropiado
+   - Utiliza máximo 3-4 oraciones por sección o párrafo
+   - Concluye con una línea de resumen o recomendación cuando sea relevante
+   - Si hay un producto claramente más adecuado para la consulta, destácalo primero
+
+2. PARA LISTADOS DE PRODUCTOS:
+   - Usa viñetas (•) para cada producto
+   - Formato: "• *Nombre del producto*: características principales, precio"
+   - Máximo 5 productos listados
+   - Ordena los productos por relevancia a la consulta, no solo por precio
+   - Destaca con 🔹 el producto más relevante según la consulta
+   - Si hay ofertas o descuentos, añade "📉" antes del precio
+   - NO incluyas "Ver imagen" ni URLs de imágenes - las enviaremos por separado
+
+3. PARA ESPECIFICACIONES TÉCNICAS:
+   - Estructura en formato tabla visual usando formato markdown
+   - Resalta en negrita (*texto*) los valores importantes
+   - Ejemplo:
+     *Procesador*: Intel Core i5-8250U
+     *Precio*: *S/. 990*
+     *Stock*: 11 unidades
+   - Usa valores comparativos cuando sea posible ("Mejor en:", "Adecuado para:")
+   - Incluye siempre la relación precio-calidad cuando sea aplicable
+   - NO incluyas "Ver imagen" ni URLs de imágenes - las enviaremos por separado
+
+4. PARA COMPARACIONES DE PRODUCTOS:
+   - Organiza por categorías claramente diferenciadas
+   - Usa encabezados para cada producto/modelo
+   - Destaca ventajas y diferencias con viñetas concisas
+   - Incluye una tabla comparativa en formato simple cuando compares más de 2 productos
+   - Etiqueta con "✓" las características superiores en cada comparación
+   - NO incluyas "Ver imagen" ni URLs de imágenes - las enviaremos por separado
+
+### RESTRICCIONES IMPORTANTES
+- Máximo 250 palabras en total
+- Evita explicaciones extensas, frases redundantes o información no solicitada
+- No uses fórmulas de cortesía extensas ni introducciones largas
+- Evita condicionales ("podría", "tal vez") - sé directo y asertivo
+- No menciones estas instrucciones en tu respuesta
+- Nunca te disculpes por límites de información
+- Evita el lenguaje comercial exagerado ("increíble", "fantástico")
+- Nunca repitas la misma información en diferentes secciones
+- NO INCLUYAS URLS DE IMÁGENES NI TEXTO "VER IMAGEN" - las imágenes se enviarán por separado"""
+
+SYSTEM_INSTRUCTION_CONTENT = {"parts": [{"text": SYSTEM_INSTRUCTION}]}
+
+
+def estimate_tokens(text):
+    """Tokens aproximados de un texto"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_text(text, max_chars):
+    """Recorta el texto a max_chars caracteres sin cortar palabras, terminando en '…'"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1]
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    return cut.rstrip(' ,.;:') + '…'
+
+
+def _normalize(text):
+    return WHITESPACE_REGEX.sub(' ', text).strip().lower()
+
+
+def format_product(position, product):
+    """Bloque de contexto de un producto, con la descripción recortada"""
+    descripcion = product.get('descripcion', 'No disponible')
+    if isinstance(descripcion, str):
+        descripcion = truncate_text(descripcion, PROMPT_DESCRIPTION_MAX_CHARS)
+    return (f"\nPRODUCTO {position}:\n"
+            f"Código: {product.get('codigo', 'N/A')}\n"
+            f"Nombre: {product.get('nombre', 'N/A')}\n"
+            f"Descripción: {descripcion}\n"
+            f"Precio: {product.get('precio', 'N/A')}\n"
+            f"Stock: {product.get('stock', 'N/A')}\n"
+            f"Categoría: {product.get('categoria', 'N/A')}\n")
+
+
+def select_chunks(chunks, scores=None):
+    """Fragmentos del PDF que vale la pena enviar: sin puntuación nula ni muy por debajo del mejor"""
+    if scores is None:
+        return list(chunks)
+    best = max(scores, default=0)
+    if best <= 0:
+        return []
+    return [chunk for chunk, score in zip(chunks, scores) if score > 0 and score >= best * PROMPT_MIN_CHUNK_SCORE_RATIO]
+
+
+def overlap_length(first, second):
+    """Longitud del final de first que se repite al principio de second (0 si es menor que DEDUPE_MIN_LINE_CHARS)"""
+    for start in range(max(0, len(first) - len(second)), len(first) - DEDUPE_MIN_LINE_CHARS + 1):
+        if second.startswith(first[start:]):
+            return len(first) - start
+    return 0
+
+
+def remove_overlaps(chunk, included):
+    """
+    Quita del fragmento el texto que comparte con fragmentos ya incluidos: los fragmentos
+    contiguos del catálogo se solapan unas palabras al principio o al final.
+    """
+    for other in included:
+        chunk = chunk[overlap_length(other, chunk):]
+        overlap = overlap_length(chunk, other)
+        if overlap:
+            chunk = chunk[:-overlap]
+    return chunk.strip()
+
+
+def dedupe_lines(text, db_seen):
+    """Quita las líneas que repiten datos ya dados por la base de datos (db_seen, normalizado)"""
+    kept = []
+    for line in text.split('\n'):
+        normalized = _normalize(line)
+        if not normalized or (len(normalized) >= DEDUPE_MIN_LINE_CHARS and normalized in db_seen):
+            continue
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+def assemble_context(db_results, pdf_results, budget=GEMINI_CONTEXT_TOKEN_BUDGET):
+    """
+    Arma el contexto de productos y del catálogo PDF dentro del presupuesto de tokens.
+
+    Los productos van primero (tienen prioridad); después los fragmentos del PDF por
+    orden de relevancia, sin el texto repetido, hasta agotar el presupuesto.
+    Devuelve un dict con db_context, pdf_context, products (los incluidos), tokens y
+    dropped_chunks.
+    """
+    remaining = budget
+    db_seen = ''
+    db_context = ''
+    products = []
+
+    if db_results["success"] and db_results["products"]:
+        blocks = []
+        for product in db_results["products"][:PROMPT_MAX_PRODUCTS]:
+            block = format_product(len(products) + 1, product)
+            tokens = estimate_tokens(block)
+            # Al menos un producto aunque no quepa: es la información principal
+            if products and tokens > remaining:
+                break
+            blocks.append(block)
+            products.append(product)
+            remaining -= tokens
+            db_seen += _normalize(block) + '\n'
+
+        db_context = "### INFORMACIÓN DE BASE DE DATOS\n" + ''.join(blocks)
+        total_products = db_results.get("total", len(db_results["products"]))
+        if total_products > len(products):
+            db_context += f"\n(Y {total_products - len(products)} productos más encontrados)\n"
+
+    pdf_context = ''
+    dropped_chunks = 0
+    if pdf_results["success"] and pdf_results["chunks"]:
+        chunks = select_chunks(pdf_results["chunks"], pdf_results.get("scores"))
+        dropped_chunks = len(pdf_results["chunks"]) - len(chunks)
+        included = []
+        included_originals = []
+        for position, original in enumerate(chunks):
+            chunk = dedupe_lines(remove_overlaps(original, included_originals), db_seen)
+            if not chunk.strip():
+                continue
+            included_originals.append(original)
+            tokens = estimate_tokens(chunk)
+            if tokens > remaining:
+                # El último que cabe se recorta; los siguientes se descartan
+                if remaining >= PROMPT_MIN_TRUNCATED_TOKENS:
+                    included.append(truncate_text(chunk, remaining * CHARS_PER_TOKEN))
+                    remaining -= estimate_tokens(included[-1])
+                    position += 1
+                dropped_chunks += len(chunks) - position
+                break
+            included.append(chunk)
+            remaining -= tokens
+
+        if included:
+            pdf_context = "\n### INFORMACIÓN ADICIONAL DEL CATÁLOGO PDF\n" + "\n\n".join(included)
+
+    return {
+        "db_context": db_context,
+        "pdf_context": pdf_context,
+        "products": products,
+        "tokens": budget - remaining,
+        "dropped_chunks": dropped_chunks
+    }
+
+
+def build_gemini_request(query, context):
+    """Cuerpo de la petición a Gemini: instrucciones fijas en systemInstruction y la consulta con su contexto"""
+    prompt = f"""### CONSULTA DEL USUARIO
+"{query}"
+
+{context["db_context"]}
+
+{context["pdf_context"]}"""
+    return {
+        "systemInstruction": SYSTEM_INSTRUCTION_CONTENT,
+        "contents": [{
+            "role": "user",
+            "parts": [{"text": prompt}]
+        }]
+    }
@@ -0,0 +1,179 @@
+# File: query_cache.py
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Palabras que no cambian el sentido de una consulta y se eliminan al normalizarla
+NORMALIZE_STOP_WORDS = frozenset([
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'y', 'o', 'a', 'al', 'ante',
+    'de', 'del', 'en', 'hacia', 'por', 'segun', 'tras',
+    'que', 'cual', 'cuales', 'cuanto', 'como', 'donde', 'quien', 'cuando', 'hay', 'tiene', 'tienen',
+    'tengan', 'me', 'mi', 'se', 'su', 'sus', 'es', 'son', 'lo', 'le', 'les', 'favor', 'quiero',
+    'quisiera', 'busco', 'necesito'
+])
+
+# Palabras que sí cambian el sentido ("con mouse" / "sin mouse", "menos de 800" / "más de 800"):
+# se conservan unidas al término siguiente para que no pierdan su relación al ordenar
+NORMALIZE_BOUND_WORDS = frozenset([
+    'con', 'sin', 'no', 'desde', 'hasta', 'entre', 'bajo', 'sobre', 'para',
+    'menos', 'mas', 'maximo', 'minimo', 'encima', 'debajo'
+])
+
+NORMALIZE_TOKEN_REGEX = re.compile(r'\w+')
+
+# Tamaño y duración (segundos) de cada nivel de caché
+QUERY_CACHE_TIERS = {
+    "db": (int(os.environ.get('QUERY_CACHE_DB_SIZE', 256)), float(os.environ.get('QUERY_CACHE_DB_TTL', 300))),
+    "pdf": (int(os.environ.get('QUERY_CACHE_PDF_SIZE', 256)), float(os.environ.get('QUERY_CACHE_PDF_TTL', 3600))),
+    "answer": (int(os.environ.get('QUERY_CACHE_ANSWER_SIZE', 128)), float(os.environ.get('QUERY_CACHE_ANSWER_TTL', 300))),
+    # Resultados de productos indexados por la intención ya analizada (palabras, categorías, precios)
+    "products": (int(os.environ.get('QUERY_CACHE_PRODUCTS_SIZE', 512)), float(os.environ.get('QUERY_CACHE_PRODUCTS_TTL', 300))),
+}
+
+# Duración (segundos) de los resultados "no se encontraron productos" en el nivel products
+QUERY_CACHE_NEGATIVE_TTL = float(os.environ.get('QUERY_CACHE_NEGATIVE_TTL', 60))
+
+# Valor interno para distinguir "no está en caché" de un valor None guardado
+MISSING = object()
+
+
+def fold_accents(text):
+    """Elimina tildes y diéresis (á -> a, ü -> u, ñ -> n)"""
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def normalize_query(query):
+    """
+    Normaliza una consulta para usarla como clave de caché.
+
+    Pasa a minúsculas, quita tildes y signos, elimina palabras vacías y ordena
+    los términos, de modo que "precio laptop hp" y "laptop hp precio?" comparten clave.
+    Las palabras de NORMALIZE_BOUND_WORDS forman un término con la palabra siguiente,
+    así que "laptop con mouse" y "laptop sin mouse" tienen claves distintas. Los
+    términos con cifras van al final en su orden original: el precio es el primer
+    número de la consulta, así que "monitor 24 pulgadas 500" y "monitor 500 pulgadas 24"
+    no pueden compartir clave.
+    """
+    terms = []
+    numeric_terms = []
+    bound = []
+    for token in NORMALIZE_TOKEN_REGEX.findall(fold_accents(query.lower())):
+        if token in NORMALIZE_STOP_WORDS:
+            continue
+        bound.append(token)
+        if token not in NORMALIZE_BOUND_WORDS:
+            term = ' '.join(bound)
+            (numeric_terms if any(char.isdigit() for char in token) else terms).append(term)
+            bound = []
+    if bound:
+        terms.append(' '.join(bound))
+    return ' '.join(sorted(terms) + numeric_terms)
+
+
+class LRUTTLCache:
+    """Caché LRU con caducidad por tiempo y contadores de aciertos/fallos"""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+class QueryCache:
+    """
+    Caché de varios niveles para el flujo de preguntas sobre el catálogo.
+
+    Cada nivel (resultados de base de datos, fragmentos del PDF y respuestas finales
+    de Gemini) es un LRUTTLCache independiente indexado por la consulta normalizada;
+    el nivel products se indexa por la intención de búsqueda de productos.
+    Los niveles se invalidan cuando cambia la versión del catálogo PDF o de la
+    tabla productos.
+    """
+
+    def __init__(self, tiers=None):
+        self.tiers = {name: LRUTTLCache(maxsize, ttl) for name, (maxsize, ttl) in (tiers or QUERY_CACHE_TIERS).items()}
+        self.catalog_version = None
+        self.productos_version = None
+        self._lock = threading.Lock()
+
+    def get(self, tier, key, default=MISSING):
+        return self.tiers[tier].get(key, default)
+
+    def set(self, tier, key, value, ttl=None):
+        self.tiers[tier].set(key, value, ttl)
+
+    def clear(self, *tiers):
+        for name in tiers or self.tiers:
+            self.tiers[name].clear()
+
+    def sync_versions(self, catalog_version=MISSING, productos_version=MISSING):
+        """Invalida los niveles afectados si cambió la versión del catálogo o de productos"""
+        with self._lock:
+            if catalog_version is not MISSING and catalog_version != self.catalog_version:
+                if self.catalog_version is not None:
+                    print('♻️ El catálogo PDF cambió: invalidando caché de fragmentos y respuestas')
+                    self.clear("pdf", "answer")
+                self.catalog_version = catalog_version
+
+            if productos_version is not MISSING and productos_version != self.productos_version:
+                if self.productos_version is not None:
+                    print('♻️ La tabla productos cambió: invalidando caché de base de datos y respuestas')
+                    self.clear("db", "products", "answer")
+                self.productos_version = productos_version
+
+    def stats(self):
+        return {name: tier.stats() for name, tier in self.tiers.items()}
+
+
+query_cache = QueryCache()
@@ -0,0 +1,659 @@
+# File: retrieval.py
+import math
+import re
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# Palabras vacías que se ignoran en las consultas al catálogo
+STOP_WORDS = frozenset(['el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'y', 'o', 'a', 'ante', 'bajo', 'con', 'de', 'desde', 'en', 'entre', 'hacia', 'hasta', 'para', 'por', 'según', 'sin', 'sobre', 'tras'])
+
+TOKEN_REGEX = re.compile(r'\w+')
+NUMBER_REGEX = re.compile(r'\d+')
+
+# Tolerancia relativa para considerar que un número del catálogo está cerca de un precio de la consulta
+PRICE_TOLERANCE = 0.1
+
+# Máximo de vectores de términos que VectorizedScorer conserva entre consultas
+MAX_CACHED_TERM_COLUMNS = 1024
+
+
+def tokenize(text):
+    """Divide un texto en términos en minúsculas"""
+    return TOKEN_REGEX.findall(text.lower())
+
+
+def extract_query_terms(query):
+    """Obtiene los términos útiles de una consulta (más de 2 letras y sin palabras vacías)"""
+    return [term for term in tokenize(query) if len(term) > 2 and term not in STOP_WORDS]
+
+
+def extract_heuristic_query(query):
+    """Obtiene los términos y los números (precios) de una consulta para la puntuación heurística"""
+    lower_query = query.lower()
+    query_terms = [term.strip() for term in lower_query.split()]
+    query_terms = [term for term in query_terms if len(term) > 2 and term not in STOP_WORDS]
+    price_numbers = [int(match) for match in NUMBER_REGEX.findall(lower_query)]
+    return query_terms, price_numbers
+
+
+# Improved function to find the most relevant chunks for the query (from k.js)
+def find_relevant_chunks(chunks, query, max_chunks=5):
+    """Encuentra los fragmentos más relevantes para la consulta usando TF-IDF simplificado."""
+    if not chunks:
+        return []
+
+    query_terms, price_numbers = extract_heuristic_query(query)
+
+    scored_chunks = []
+    for chunk in chunks:
+        lower_chunk = chunk.lower()
+        score = 0
+
+        for term in query_terms:
+            matches = lower_chunk.count(term)
+            if matches > 0:
+                score += matches * (len(term) / 3)
+
+        if price_numbers:
+            chunk_numbers = [int(match) for match in NUMBER_REGEX.findall(lower_chunk)]
+            for chunk_num in chunk_numbers:
+                for price_num in price_numbers:
+                    if abs(chunk_num - price_num) <= price_num * PRICE_TOLERANCE:
+                        score += 2
+
+        term_matches = len([term for term in query_terms if term in lower_chunk])
+        if term_matches > 1:
+            score *= (1 + (term_matches / len(query_terms)))
+
+        scored_chunks.append({"chunk": chunk, "score": score})
+
+    scored_chunks.sort(key=lambda x: x["score"], reverse=True)
+    relevant_chunks = [item["chunk"] for item in scored_chunks[:max_chunks]]
+
+    print(f'🔍 Puntuaciones más altas: {[round(c["score"], 2) for c in scored_chunks[:min(3, len(scored_chunks))]]}') # Added min check
+
+    return relevant_chunks
+
+
+class NumericIndex:
+    """
+    Índice ordenado de los números que aparecen en los fragmentos.
+
+    Los números se extraen una sola vez y se guardan como dos arrays paralelos
+    ordenados por valor (valor, id de fragmento), de modo que la búsqueda de
+    números a ±10% de un precio es una búsqueda binaria más el recorrido de la
+    ventana encontrada, en lugar de comparar todos los números del catálogo.
+    """
+
+    def __init__(self):
+        self.values = array('d')
+        self.doc_ids = array('q')
+        self._numbers = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        if self._dirty:
+            self._build()
+        return len(self.values)
+
+    def add_document(self, doc_id, text):
+        with self._lock:
+            self._numbers[doc_id] = [int(match) for match in NUMBER_REGEX.findall(text)]
+            self._dirty = True
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            if self._numbers.pop(doc_id, None) is not None:
+                self._dirty = True
+
+    def apply_catalog_changes(self, removed_ids, added_chunks):
+        """Actualiza los números con los fragmentos eliminados y añadidos del catálogo"""
+        with self._lock:
+            for doc_id in removed_ids:
+                self.remove_document(doc_id)
+            for doc_id, text in added_chunks:
+                self.add_document(doc_id, text)
+
+    def _build(self):
+        with self._lock:
+            pairs = sorted((float(value), doc_id) for doc_id, numbers in self._numbers.items() for value in numbers)
+            self.values = array('d', (value for value, _ in pairs))
+            self.doc_ids = array('q', (doc_id for _, doc_id in pairs))
+            self._dirty = False
+
+    def count_near(self, price, tolerance=PRICE_TOLERANCE):
+        """Devuelve {doc_id: cantidad de números a ±tolerance del precio}"""
+        with self._lock:
+            if self._dirty:
+                self._build()
+
+            window = price * tolerance
+            # Ventana algo más amplia para no perder bordes por redondeo; se filtra con la condición exacta
+            slack = 1e-9 * max(1.0, abs(price))
+            start = bisect_left(self.values, price - window - slack)
+            end = bisect_right(self.values, price + window + slack)
+
+            hits = {}
+            for position in range(start, end):
+                if abs(self.values[position] - price) <= window:
+                    doc_id = self.doc_ids[position]
+                    hits[doc_id] = hits.get(doc_id, 0) + 1
+            return hits
+
+
+def _with_texts(engine, best):
+    """
+    Añade el texto a cada (puntuación, doc_id) de best.
+
+    Con text_source el texto se lee sin tener el lock del motor: text_source toma el
+    lock del CatalogIndex, que al re-indexar llama a apply_catalog_changes con su lock
+    tomado, y tomar los dos en orden inverso podría bloquear ambos hilos. Un fragmento
+    borrado entretanto se omite.
+    """
+    if engine.text_source is None:
+        with engine._lock:
+            return [(score, doc_id, engine.texts[doc_id]) for score, doc_id in best]
+    results = [(score, doc_id, engine.text_source(doc_id)) for score, doc_id in best]
+    return [result for result in results if result[2] is not None]
+
+
+class HeuristicIndex:
+    """
+    Puntuación heurística de find_relevant_chunks con estructuras precalculadas.
+
+    Los fragmentos se guardan una sola vez, en minúsculas, concatenados en un único
+    texto con el desplazamiento de cada uno; las apariciones de los términos se buscan
+    sobre ese texto, así que solo se recorren los fragmentos que los contienen, y los
+    números quedan en un NumericIndex, por lo que la proximidad de precios ya no recorre
+    todos los números del catálogo en cada consulta. Mantiene los mismos pesos y el
+    mismo orden de resultados que find_relevant_chunks.
+
+    Con text_source (id -> texto, p. ej. CatalogIndex.get_chunk_text) los textos
+    originales de los resultados se leen del almacén compartido en lugar de copiarse.
+    """
+
+    def __init__(self, text_source=None):
+        self.text_source = text_source
+        self.texts = {}
+        self.numbers = NumericIndex()
+        self._ordered_ids = []
+        self._rows = {}
+        self._corpus = ''
+        self._offsets = array('q')
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        """Construye el índice a partir de una lista de fragmentos (id = posición)"""
+        index = cls(**kwargs)
+        index.apply_catalog_changes([], list(enumerate(chunks)))
+        return index
+
+    def __len__(self):
+        return len(self._ordered_ids)
+
+    def _lower_text(self, row):
+        end = self._offsets[row + 1] - 1 if row + 1 < len(self._offsets) else len(self._corpus)
+        return self._corpus[self._offsets[row]:end]
+
+    def apply_catalog_changes(self, removed_ids, added_chunks):
+        """Actualiza el índice con los fragmentos eliminados y añadidos del catálogo"""
+        with self._lock:
+            added = {doc_id: text.lower() for doc_id, text in added_chunks}
+            removed = set(removed_ids)
+            lower_texts = {doc_id: self._lower_text(row) for doc_id, row in self._rows.items()
+                           if doc_id not in removed and doc_id not in added}
+            lower_texts.update(added)
+
+            # Texto en minúsculas de todos los fragmentos concatenado, con el desplazamiento de cada uno
+            self._ordered_ids = sorted(lower_texts)
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ordered_ids)}
+            self._offsets = array('q')
+            position = 0
+            for doc_id in self._ordered_ids:
+                self._offsets.append(position)
+                position += len(lower_texts[doc_id]) + 1
+            self._corpus = '\x00'.join(lower_texts[doc_id] for doc_id in self._ordered_ids)
+
+            if self.text_source is None:
+                for doc_id in removed_ids:
+                    self.texts.pop(doc_id, None)
+                self.texts.update(added_chunks)
+            self.numbers.apply_catalog_changes(removed_ids, list(added.items()))
+
+    def _price_hits(self, price_numbers):
+        price_hits = {}
+        for price_num in price_numbers:
+            for doc_id, hits in self.numbers.count_near(price_num).items():
+                price_hits[doc_id] = price_hits.get(doc_id, 0) + hits
+        return price_hits
+
+    def _term_counts(self, query_terms):
+        """
+        {doc_id: {término: apariciones}} de los fragmentos que contienen algún término.
+        Las apariciones no se solapan, como en str.count, y ninguna cruza el separador.
+        """
+        counts = {}
+        for term in set(query_terms):
+            if '\x00' in term:
+                continue
+            position = self._corpus.find(term)
+            while position != -1:
+                doc_id = self._ordered_ids[bisect_right(self._offsets, position) - 1]
+                term_counts = counts.setdefault(doc_id, {})
+                term_counts[term] = term_counts.get(term, 0) + 1
+                position = self._corpus.find(term, position + len(term))
+        return counts
+
+    @staticmethod
+    def _score_chunk(term_counts, query_terms, price_hits):
+        score = 0
+        term_matches = 0
+
+        for term in query_terms:
+            matches = term_counts.get(term, 0)
+            if matches > 0:
+                score += matches * (len(term) / 3)
+                term_matches += 1
+
+        # De 2 en 2, como find_relevant_chunks: sumar 2 * price_hits de una vez puede
+        # redondear distinto y cambiar el orden de fragmentos empatados
+        for _ in range(price_hits):
+            score += 2
+
+        if term_matches > 1:
+            score *= (1 + (term_matches / len(query_terms)))
+        return score
+
+    def _query_hits(self, query):
+        query_terms, price_numbers = extract_heuristic_query(query)
+        price_hits = self._price_hits(price_numbers) if price_numbers else {}
+        term_counts = self._term_counts(query_terms) if query_terms else {}
+        return query_terms, term_counts, price_hits
+
+    def score(self, query):
+        """Devuelve [(puntuación, doc_id)] para todos los fragmentos en orden de id"""
+        with self._lock:
+            query_terms, term_counts, price_hits = self._query_hits(query)
+            return [(self._score_chunk(term_counts.get(doc_id, {}), query_terms, price_hits.get(doc_id, 0)), doc_id)
+                    for doc_id in self._ordered_ids]
+
+    def iter_scores(self, query, min_score=None):
+        """
+        Genera (puntuación, doc_id) de los fragmentos sin guardar puntuaciones intermedias.
+
+        Primero se puntúan, en orden de id, los fragmentos que contienen algún término
+        o algún número cercano a un precio de la consulta; el resto tiene puntuación 0,
+        así que solo se recorren mientras min_score() no supere ese valor.
+        """
+        with self._lock:
+            query_terms, term_counts, price_hits = self._query_hits(query)
+            candidates = set(term_counts)
+            candidates.update(price_hits)
+
+            for doc_id in sorted(candidates):
+                yield self._score_chunk(term_counts.get(doc_id, {}), query_terms, price_hits.get(doc_id, 0)), doc_id
+
+            for doc_id in self._ordered_ids:
+                if min_score is not None:
+                    threshold = min_score()
+                    if threshold is not None and threshold > 0:
+                        return
+                if doc_id not in candidates:
+                    yield 0, doc_id
+
+    def search_with_scores(self, query, max_chunks=5, streaming=False):
+        """
+        Devuelve [(puntuación, doc_id, texto)] de los max_chunks fragmentos más relevantes.
+
+        Con streaming=True las puntuaciones se consumen desde iter_scores manteniendo
+        solo un heap de max_chunks elementos, y el recorrido se corta en cuanto los
+        fragmentos restantes no pueden superar al k-ésimo mejor.
+        """
+        if not streaming:
+            scored = self.score(query)
+            best = heapq.nsmallest(max_chunks, scored, key=lambda item: (-item[0], item[1]))
+        else:
+            if max_chunks <= 0:
+                return []
+            # Heap de mínimos con (puntuación, -doc_id): en la cima está el peor de los k mejores
+            heap = []
+
+            def kth_score():
+                return heap[0][0] if len(heap) >= max_chunks else None
+
+            for score, doc_id in self.iter_scores(query, min_score=kth_score):
+                entry = (score, -doc_id)
+                if len(heap) < max_chunks:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            best = [(score, -neg_id) for score, neg_id in sorted(heap, reverse=True)]
+
+        return _with_texts(self, best)
+
+    def search(self, query, max_chunks=5, streaming=False):
+        """Devuelve los textos de los fragmentos más relevantes para la consulta"""
+        results = self.search_with_scores(query, max_chunks, streaming=streaming)
+        print(f'🔍 Puntuaciones más altas: {[round(score, 2) for score, _, _ in results[:3]]}')
+        return [text for _, _, text in results]
+
+
+class BM25Index:
+    """
+    Motor de recuperación BM25 sobre los fragmentos del catálogo.
+
+    Se construye una sola vez con un índice invertido término -> {id: frecuencia}
+    y la longitud de cada documento, de modo que cada consulta solo recorre los
+    fragmentos que contienen al menos uno de sus términos. Implementa
+    apply_catalog_changes para actualizarse cuando CatalogIndex re-indexa páginas.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, text_source=None):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        # Con text_source (id -> texto, p. ej. CatalogIndex.get_chunk_text) los textos
+        # se leen del almacén compartido en lugar de copiarse en el índice
+        self.text_source = text_source
+        self.texts = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        """Construye el índice a partir de una lista de fragmentos (id = posición)"""
+        index = cls(**kwargs)
+        for chunk_id, chunk in enumerate(chunks):
+            index.add_document(chunk_id, chunk)
+        return index
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add_document(self, doc_id, text):
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self.remove_document(doc_id)
+
+            terms = Counter(tokenize(text))
+            length = sum(terms.values())
+            for term, freq in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = freq
+
+            self.doc_terms[doc_id] = tuple(terms)
+            self.doc_lengths[doc_id] = length
+            if self.text_source is None:
+                self.texts[doc_id] = text
+            self.total_length += length
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            if doc_id not in self.doc_lengths:
+                return
+
+            for term in self.doc_terms.pop(doc_id):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self.texts.pop(doc_id, None)
+
+    def apply_catalog_changes(self, removed_ids, added_chunks):
+        """Actualiza el índice con los fragmentos eliminados y añadidos del catálogo"""
+        with self._lock:
+            for doc_id in removed_ids:
+                self.remove_document(doc_id)
+            for doc_id, text in added_chunks:
+                self.add_document(doc_id, text)
+
+    def score(self, query):
+        """Devuelve {doc_id: puntuación} para los fragmentos que contienen algún término"""
+        with self._lock:
+            total_docs = len(self.doc_lengths)
+            if not total_docs:
+                return {}
+
+            avg_length = self.total_length / total_docs or 1
+            scores = {}
+            for term in set(extract_query_terms(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+
+                doc_freq = len(posting)
+                idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+                for doc_id, freq in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+            return scores
+
+    def search_with_scores(self, query, max_chunks=5, streaming=False):
+        """
+        Devuelve [(puntuación, doc_id, texto)] de los max_chunks fragmentos más relevantes.
+
+        Solo se puntúan los fragmentos de las listas de ocurrencias y la selección ya usa
+        un heap acotado, por lo que streaming no cambia el comportamiento.
+        """
+        scores = self.score(query)
+        best = heapq.nsmallest(max_chunks, scores.items(), key=lambda item: (-item[1], item[0]))
+        return _with_texts(self, [(score, doc_id) for doc_id, score in best])
+
+    def get_text(self, doc_id):
+        if self.text_source is not None:
+            return self.text_source(doc_id)
+        return self.texts[doc_id]
+
+    def search(self, query, max_chunks=5, streaming=False):
+        """Devuelve los textos de los fragmentos más relevantes para la consulta"""
+        results = self.search_with_scores(query, max_chunks, streaming=streaming)
+        print(f'🔍 Puntuaciones BM25 más altas: {[round(score, 2) for score, _, _ in results[:3]]}')
+        return [text for _, _, text in results]
+
+
+class VectorizedScorer:
+    """
+    Versión vectorizada de la puntuación heurística de find_relevant_chunks.
+
+    Los fragmentos se representan como una matriz dispersa CSR fragmentos x
+    vocabulario (tokens separados por espacios) con sus frecuencias, y los números
+    de cada fragmento como otra matriz dispersa fragmentos x valores. Una consulta
+    se puntúa con unos pocos productos matriz-vector usando los mismos pesos que
+    find_relevant_chunks: len(término) / 3 por aparición, +2 por número a ±10% de
+    un precio de la consulta y el multiplicador por cobertura de términos.
+
+    Las matrices se actualizan con cada cambio del catálogo quitando y añadiendo
+    filas, así que no hace falta conservar los textos; con text_source (id -> texto)
+    los de los resultados se leen del almacén compartido. Requiere numpy y scipy.
+    """
+
+    def __init__(self, text_source=None):
+        import numpy
+        import scipy.sparse
+
+        self._np = numpy
+        self._sparse = scipy.sparse
+        self.text_source = text_source
+        self.texts = {}
+        self.doc_ids = []
+        self._vocabulary_columns = {}
+        self._number_columns = {}
+        self.vocabulary = numpy.array([], dtype=object)
+        self.number_values = numpy.array([], dtype=numpy.float64)
+        self.term_matrix = scipy.sparse.csr_matrix((0, 0), dtype=numpy.float64)
+        self.number_matrix = scipy.sparse.csr_matrix((0, 0), dtype=numpy.float64)
+        self._term_columns = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        """Construye el puntuador a partir de una lista de fragmentos (id = posición)"""
+        scorer = cls(**kwargs)
+        scorer.apply_catalog_changes([], list(enumerate(chunks)))
+        return scorer
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _update_matrix(self, matrix, keep, added_rows, rows, cols, columns):
+        """Filas keep de matrix seguidas de added_rows filas nuevas (entradas rows/cols)"""
+        np = self._np
+        sparse = self._sparse
+        kept = matrix[keep]
+        kept = sparse.csr_matrix((kept.data, kept.indices, kept.indptr), shape=(len(keep), columns))
+        # Las entradas repetidas se suman al convertir a CSR: quedan las frecuencias
+        added = sparse.csr_matrix((np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(added_rows, columns))
+        return sparse.vstack([kept, added], format='csr')
+
+    def apply_catalog_changes(self, removed_ids, added_chunks):
+        """Quita de las matrices las filas de los fragmentos eliminados y añade las de los nuevos"""
+        np = self._np
+        with self._lock:
+            added_ids = [doc_id for doc_id, _ in added_chunks]
+            replaced = set(removed_ids).union(added_ids)
+            keep = np.array([row for row, doc_id in enumerate(self.doc_ids) if doc_id not in replaced], dtype=np.intp)
+
+            term_rows, term_cols = [], []
+            number_rows, number_cols = [], []
+            for row, (doc_id, text) in enumerate(added_chunks):
+                lower_chunk = text.lower()
+                for token in lower_chunk.split():
+                    term_rows.append(row)
+                    term_cols.append(self._vocabulary_columns.setdefault(token, len(self._vocabulary_columns)))
+                for match in NUMBER_REGEX.findall(lower_chunk):
+                    number_rows.append(row)
+                    number_cols.append(self._number_columns.setdefault(int(match), len(self._number_columns)))
+
+            # Filas nuevas al final y después todas en orden de id, como find_relevant_chunks
+            term_matrix = self._update_matrix(self.term_matrix, keep, len(added_chunks),
+                                              term_rows, term_cols, len(self._vocabulary_columns))
+            number_matrix = self._update_matrix(self.number_matrix, keep, len(added_chunks),
+                                                number_rows, number_cols, len(self._number_columns))
+            doc_ids = [self.doc_ids[row] for row in keep] + added_ids
+            order = np.argsort(np.array(doc_ids, dtype=np.int64), kind='stable')
+            self.term_matrix = term_matrix[order]
+            self.number_matrix = number_matrix[order]
+            self.doc_ids = [doc_ids[row] for row in order]
+
+            self.vocabulary = np.array(list(self._vocabulary_columns), dtype=object)
+            self.number_values = np.array([float(value) for value in self._number_columns], dtype=np.float64)
+            self._term_columns = {}
+
+            if self.text_source is None:
+                for doc_id in replaced:
+                    self.texts.pop(doc_id, None)
+                self.texts.update(added_chunks)
+
+    def _term_weights(self, term):
+        """Vector (vocabulario) con las apariciones del término dentro de cada token"""
+        weights = self._term_columns.get(term)
+        if weights is None:
+            if len(self._term_columns) >= MAX_CACHED_TERM_COLUMNS:
+                self._term_columns.clear()
+            weights = self._np.fromiter((token.count(term) for token in self.vocabulary),
+                                        dtype=self._np.float64, count=len(self.vocabulary))
+            self._term_columns[term] = weights
+        return weights
+
+    def score(self, query):
+        """Devuelve el vector de puntuaciones (en el orden de doc_ids) para la consulta"""
+        np = self._np
+        with self._lock:
+            scores = np.zeros(len(self.doc_ids), dtype=np.float64)
+            if not self.doc_ids:
+                return scores
+
+            query_terms, price_numbers = extract_heuristic_query(query)
+
+            # Las sumas se hacen término a término y de 2 en 2, en el mismo orden que
+            # find_relevant_chunks: sumar en otro orden cambia el redondeo y con él el
+            # orden de fragmentos con la misma puntuación
+            if query_terms:
+                # Apariciones de cada término en cada fragmento: (fragmentos x términos)
+                weights = np.column_stack([self._term_weights(term) for term in query_terms])
+                counts = np.asarray(self.term_matrix @ weights)
+                for column, term in enumerate(query_terms):
+                    scores += counts[:, column] * (len(term) / 3)
+
+            if price_numbers and len(self.number_values):
+                prices = np.array(price_numbers, dtype=np.float64)
+                # Para cada valor distinto, cuántos precios de la consulta están a ±10%
+                near = (np.abs(self.number_values[:, None] - prices[None, :]) <= prices[None, :] * PRICE_TOLERANCE).sum(axis=1)
+                hits = np.asarray(self.number_matrix @ near.astype(np.float64)).ravel()
+                for hit in range(int(hits.max(initial=0))):
+                    scores += np.where(hits > hit, 2.0, 0.0)
+
+            if query_terms:
+                term_matches = (counts > 0).sum(axis=1)
+                multiplier = np.where(term_matches > 1, 1 + term_matches / len(query_terms), 1.0)
+                scores *= multiplier
+
+            return scores
+
+    def search_with_scores(self, query, max_chunks=5, streaming=False):
+        """
+        Devuelve [(puntuación, doc_id, texto)] de los max_chunks fragmentos más relevantes.
+
+        La puntuación se calcula de una vez para toda la matriz; streaming se acepta
+        por compatibilidad con los demás motores y no cambia el resultado.
+        """
+        np = self._np
+        with self._lock:
+            scores = self.score(query)
+            total = len(scores)
+            if not total or max_chunks <= 0:
+                return []
+
+            k = min(max_chunks, total)
+            # argpartition da el umbral del k-ésimo; los empates se resuelven por posición como sort()
+            threshold = scores[np.argpartition(scores, total - k)[total - k]]
+            candidates = np.flatnonzero(scores >= threshold)
+            order = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+            best = [(float(scores[row]), self.doc_ids[row]) for row in order]
+        return _with_texts(self, best)
+
+    def search(self, query, max_chunks=5, streaming=False):
+        """Devuelve los textos de los fragmentos más relevantes para la consulta"""
+        results = self.search_with_scores(query, max_chunks, streaming=streaming)
+        print(f'🔍 Puntuaciones más altas: {[round(score, 2) for score, _, _ in results[:3]]}')
+        return [text for _, _, text in results]
+
+
+# Motores de recuperación asociados a cada índice de catálogo
+_engines = {}
+_engines_lock = threading.Lock()
+
+ENGINE_FACTORIES = {
+    'bm25': BM25Index,
+    'heuristic': HeuristicIndex,
+    'vectorized': VectorizedScorer,
+}
+
+
+def get_retrieval_engine(catalog_index, engine='bm25'):
+    """
+    Devuelve el motor de recuperación asociado a un índice de catálogo.
+
+    El motor se crea una sola vez y se suscribe al índice, por lo que se mantiene
+    actualizado cuando el catálogo cambia sin reconstruirse en cada consulta.
+    """
+    if engine not in ENGINE_FACTORIES:
+        raise ValueError(f"Motor de recuperación desconocido: {engine}")
+
+    key = (id(catalog_index), engine)
+    with _engines_lock:
+        retriever = _engines.get(key)
+        if retriever is None:
+            retriever = ENGINE_FACTORIES[engine](text_source=catalog_index.get_chunk_text)
+            catalog_index.add_listener(retriever)
+            _engines[key] = retriever
+        return retriever
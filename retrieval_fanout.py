@@ -0,0 +1,96 @@
+# File: retrieval_fanout.py
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from gemini_client import LatencyHistogram
+
+# Segundos máximos esperando a cada fuente antes de seguir sin ella
+RETRIEVAL_DB_TIMEOUT = float(os.environ.get('RETRIEVAL_DB_TIMEOUT', 8))
+RETRIEVAL_PDF_TIMEOUT = float(os.environ.get('RETRIEVAL_PDF_TIMEOUT', 5))
+
+# Hilos compartidos por todas las consultas (cada consulta usa uno por fuente)
+RETRIEVAL_FANOUT_WORKERS = int(os.environ.get('RETRIEVAL_FANOUT_WORKERS', 8))
+
+
+class RetrievalFanout:
+    """
+    Consulta a la vez varias fuentes de contexto independientes (base de datos, catálogo PDF).
+
+    Cada fuente corre en un hilo del pool con su propio plazo, contado desde que empieza
+    la consulta; si no responde a tiempo o falla se usa su valor de reserva y se sigue
+    con las demás. Una fuente que vence el plazo no se interrumpe: termina en segundo
+    plano (y puede dejar su resultado en caché para la siguiente consulta). La duración
+    de cada fuente se acumula en un histograma.
+    """
+
+    def __init__(self, max_workers=RETRIEVAL_FANOUT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.timeouts = {}
+        self.errors = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='retrieval')
+            return self._executor
+
+    def _timed(self, name, function, durations):
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            durations[name] = round(elapsed_ms, 1)
+            with self._lock:
+                histogram = self.latencies.setdefault(name, LatencyHistogram())
+            histogram.observe(elapsed_ms)
+
+    def run(self, sources):
+        """
+        sources: {nombre: (función sin argumentos, plazo en segundos, valor de reserva)}.
+
+        Devuelve (resultados, informe): resultados tiene el valor de cada fuente (o su
+        reserva) e informe el estado ('ok', 'timeout' o 'error') y los ms que tardó cada
+        una (los del plazo si no terminó).
+        """
+        executor = self._get_executor()
+        start = time.perf_counter()
+        durations = {}
+        futures = {name: executor.submit(self._timed, name, function, durations)
+                   for name, (function, _, _) in sources.items()}
+
+        results = {}
+        report = {}
+        # Se espera primero a las fuentes con el plazo más corto
+        for name in sorted(sources, key=lambda name: sources[name][1]):
+            _, timeout, fallback = sources[name]
+            try:
+                results[name] = futures[name].result(timeout=max(0.0, start + timeout - time.perf_counter()))
+                status = 'ok'
+            except FutureTimeoutError:
+                results[name] = fallback
+                status = 'timeout'
+                with self._lock:
+                    self.timeouts[name] = self.timeouts.get(name, 0) + 1
+                print(f'⏱️ La fuente {name} no respondió en {timeout:.1f}s: se continúa sin ella')
+            except Exception as e:
+                results[name] = fallback
+                status = 'error'
+                with self._lock:
+                    self.errors[name] = self.errors.get(name, 0) + 1
+                print(f'❌ Error en la fuente {name}: {e}')
+            report[name] = {"status": status, "ms": durations.get(name, round(timeout * 1000, 1))}
+        return results, report
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(histogram.stats(), timeouts=self.timeouts.get(name, 0), errors=self.errors.get(name, 0))
+                    for name, histogram in self.latencies.items()}
+
+
+retrieval_fanout = RetrievalFanout()
@@ -0,0 +1,86 @@
+# File: singleflight.py
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Segundos máximos que una consulta repetida espera la respuesta de la original antes de
+# calcular la suya
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.environ.get('SINGLEFLIGHT_WAIT_TIMEOUT', 90))
+
+
+class SingleFlight:
+    """
+    Agrupa las llamadas simultáneas con la misma clave en una sola ejecución.
+
+    La primera llamada con una clave ejecuta la función; las que llegan mientras tanto con
+    la misma clave esperan su Future y reciben el mismo resultado (o la misma excepción).
+    Al terminar la clave se libera, así que las llamadas posteriores vuelven a ejecutarse
+    (la caché de respuestas ya se encarga de reutilizar resultados terminados).
+
+    Si una llamada que espera supera wait_timeout, ejecuta la función por su cuenta,
+    fuera de cualquier ejecución agrupada: cada llamada que agota el plazo repite el
+    trabajo, y esas ejecuciones no se agrupan entre sí ni con llamadas posteriores.
+
+    Solo agrupa llamadas de hilos distintos: con un único hilo que atiende los mensajes
+    de uno en uno (el bucle actual del bot) nunca hay dos llamadas en curso a la vez.
+    """
+
+    def __init__(self, wait_timeout=SINGLEFLIGHT_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        self.wait_timeouts = 0
+
+    def do(self, key, function):
+        """Devuelve (resultado, compartido): compartido es True si el resultado vino de otra llamada en curso"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_timeout), True
+            except FutureTimeoutError:
+                with self._lock:
+                    self.shared -= 1
+                    self.wait_timeouts += 1
+                    self.executions += 1
+                print(f'⏱️ La consulta idéntica en curso tarda más de {self.wait_timeout:.0f}s: se procesa por separado')
+                # Fuera de la ejecución agrupada: cada seguidor que agota el plazo la repite
+                return function(), False
+
+        # La clave se libera antes de publicar el resultado: quien lo reciba y vuelva a
+        # llamar con la misma clave (p. ej. para reintentar) inicia una ejecución nueva
+        try:
+            result = function()
+        except BaseException as e:
+            self._release(key)
+            future.set_exception(e)
+            raise
+        self._release(key)
+        future.set_result(result)
+        return result, False
+
+    def _release(self, key):
+        with self._lock:
+            del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+                "wait_timeouts": self.wait_timeouts
+            }
+
+
+query_flights = SingleFlight()
@@ -0,0 +1,78 @@
+# File: tests/conftest.py
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+
+import pytest
+
+# Los módulos del bot están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def pg_connection():
+    """Conexión a la base de datos configurada (DB_*); las pruebas se omiten si no responde"""
+    psycopg2 = pytest.importorskip("psycopg2")
+    from db_pool import get_connection_settings
+    try:
+        conn = psycopg2.connect(connect_timeout=3, **get_connection_settings())
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL no disponible: {e}")
+    yield conn
+    conn.close()
+
+
+# Tabla productos aleatoria en SQLite para comparar la búsqueda por niveles sin PostgreSQL
+PRODUCT_WORDS = ['laptop', 'lenovo', 'hp', 'monitor', 'impresora', 'epson', 'mouse', 'gamer', 'dell', 'tablet', 'samsung', 'Cámara']
+PRODUCT_CATEGORIES = ['Laptop', 'monitor', 'impresora', 'mouse', 'tablet', 'celular', 'Cámara digital']
+
+
+def translate(sql, params):
+    """Traduce la consulta de PostgreSQL (con parámetros %(nombre)s) a SQLite"""
+    params = dict(params)
+    sql = sql.replace('::text[]', '')
+    for name, value in list(params.items()):
+        if isinstance(value, list):
+            sql = re.sub(r'(LOWER\(\w+\)) LIKE ANY\(%\(' + name + r'\)s\)',
+                         lambda match: f'EXISTS(SELECT 1 FROM json_each(:{name}) WHERE {match.group(1)} LIKE value)', sql)
+            sql = sql.replace(f'unnest(%({name})s) AS patron', f'json_each(:{name})')
+            params[name] = json.dumps(value)
+    sql = sql.replace('LIKE patron', 'LIKE value').replace('GREATEST(', 'MAX(')
+    sql = re.sub(r'%\((\w+)\)s', r':\1', sql).replace('precio ASC,', 'precio ASC NULLS LAST,')
+    return sql, params
+
+
+class SQLiteCursor:
+    """Cursor mínimo que ejecuta en SQLite las consultas de product_search (backend 'like')"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params):
+        self.rows = self.db.execute(*translate(sql, params)).fetchall()
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture(scope="module")
+def sqlite_productos():
+    rng = random.Random(11)
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE productos (codigo TEXT PRIMARY KEY, nombre, descripcion, precio, stock, categoria, imagen_url)')
+    for number in range(400):
+        db.execute('INSERT INTO productos VALUES (?, ?, ?, ?, ?, ?, ?)', (
+            f'P{number:03}',
+            ' '.join(rng.sample(PRODUCT_WORDS, 2)),
+            rng.choice([None, ' '.join(rng.sample(PRODUCT_WORDS, 3))]),
+            rng.choice([None] + [rng.randint(50, 3000)] * 20),
+            rng.randint(0, 9),
+            rng.choice(PRODUCT_CATEGORIES),
+            f'https://example.com/{number}.jpg'
+        ))
+    yield db
+    db.close()
@@ -0,0 +1,18 @@
+# File: tests/test_bot_echo.py
+import pytest
+
+from intent_parser import classify_message
+
+
+@pytest.mark.parametrize("message", [
+    "📚 *Información del Producto*\n\nLa laptop cuesta S/ 1500",
+    "_Para salir de este modo escribe *salir* o *menu*_",
+    "🔍 *Modo Consulta al Catálogo y Base de Datos*",
+])
+def test_bot_replies_are_echoes(message):
+    assert classify_message(message)["bot_echo"]
+
+
+def test_questions_are_not_echoes():
+    assert not classify_message("laptop lenovo de 1500 soles")["bot_echo"]
+    assert classify_message("MENU")["exit"]
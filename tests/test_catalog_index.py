@@ -0,0 +1,96 @@
+# File: tests/test_catalog_index.py
+import os
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+import catalog_index
+from catalog_index import CatalogIndex, compute_page_hashes
+
+
+def write_pdf(path, page_text, form_text):
+    """PDF de una página: un texto propio y otro dentro de un XObject de formulario"""
+    def text_stream(text):
+        return f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+
+    page_stream = text_stream(page_text) + b"\nq 1 0 0 1 0 -100 cm /Fm1 Do Q"
+    form_stream = text_stream(form_text)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> /XObject << /Fm1 6 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(page_stream), page_stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Font << /F1 5 0 R >> >> "
+        b"/Length %d >>\nstream\n%s\nendstream" % (len(form_stream), form_stream),
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(data)
+    # Cada versión con otra fecha para que el índice detecte el cambio
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def catalog_text(index):
+    return " ".join(text for _, text in index.get_chunks().items())
+
+
+def test_page_hash_covers_form_xobjects(tmp_path):
+    pdf_path = str(tmp_path / "catalogo.pdf")
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1500")
+    before = compute_page_hashes(pdf_path)
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1800")
+    assert compute_page_hashes(pdf_path) != before
+
+
+def test_xobject_change_reindexes_page(tmp_path):
+    pdf_path = str(tmp_path / "catalogo.pdf")
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1500")
+    index = CatalogIndex(pdf_path, cache_dir=str(tmp_path / "cache"))
+    assert "1500" in catalog_text(index)
+
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1800")
+    text = catalog_text(index)
+    assert "1800" in text and "1500" not in text
+
+
+def test_file_change_without_page_changes_rebuilds_all(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "catalogo.pdf")
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1500")
+    index = CatalogIndex(pdf_path, cache_dir=str(tmp_path / "cache"))
+    catalog_text(index)
+
+    # Un cambio que los hashes de página no ven
+    hashes = [page["hash"] for page in index.pages]
+    monkeypatch.setattr(catalog_index, "compute_page_hashes", lambda path: hashes)
+    write_pdf(pdf_path, "Laptop Lenovo", "Precio 1800")
+    text = catalog_text(index)
+    assert "1800" in text and "1500" not in text
+
+
+def test_same_file_name_in_different_folders(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = [str(tmp_path / folder / "catalogo.pdf") for folder in ("tienda_a", "tienda_b")]
+    for path, price in zip(paths, ("1500", "1800")):
+        os.makedirs(os.path.dirname(path))
+        write_pdf(path, "Laptop Lenovo", f"Precio {price}")
+
+    first, second = (CatalogIndex(path, cache_dir=cache_dir) for path in paths)
+    assert first.cache_path != second.cache_path
+    assert "1500" in catalog_text(first) and "1800" in catalog_text(second)
+
+    # Cargar uno no borra ni reemplaza la caché del otro
+    reloaded = CatalogIndex(paths[0], cache_dir=cache_dir)
+    assert "1500" in catalog_text(reloaded) and "1800" not in catalog_text(reloaded)
+    assert "1800" in catalog_text(second)
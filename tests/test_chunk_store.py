@@ -0,0 +1,37 @@
+# File: tests/test_chunk_store.py
+import pytest
+
+from chunk_store import ChunkStore, remove_chunk_store, write_chunk_store
+
+
+def test_roundtrip(tmp_path):
+    chunks = ["Laptop Lenovo S/ 1500", "", "impresión a color · garantía 12 meses", "monitor 24\""]
+    prefix = str(tmp_path / "catalogo")
+    write_chunk_store(prefix, chunks, [10, 11, 15, 20])
+
+    with ChunkStore(prefix) as store:
+        assert len(store) == 4
+        assert list(store) == chunks
+        assert store[-1] == chunks[-1]
+        assert store[1:3] == chunks[1:3]
+        assert store.get(15) == chunks[2]
+        assert store.get(12) is None
+        assert 20 in store and 12 not in store
+        assert list(store.items()) == list(zip([10, 11, 15, 20], chunks))
+        with pytest.raises(IndexError):
+            store[4]
+
+    remove_chunk_store(prefix)
+    assert not list(tmp_path.iterdir())
+
+
+def test_empty_store(tmp_path):
+    prefix = str(tmp_path / "vacio")
+    write_chunk_store(prefix, [])
+    with ChunkStore(prefix) as store:
+        assert len(store) == 0 and list(store) == []
+
+
+def test_rejects_mismatched_ids(tmp_path):
+    with pytest.raises(ValueError):
+        write_chunk_store(str(tmp_path / "x"), ["a", "b"], [1])
@@ -0,0 +1,76 @@
+# File: tests/test_chunking.py
+import os
+import random
+
+import pytest
+
+from catalog_index import extract_pages_from_pdf, split_text_into_chunks
+
+CATALOG_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'catalogo_.pdf')
+
+
+def legacy_split_text_into_chunks(text, chunk_size=250, chunk_overlap=80):
+    """split_text_into_chunks tal como estaba en main.py"""
+    if not text:
+        return []
+
+    chunks = []
+    sentences = text.split('\n')
+    sentences = [s for s in sentences if s.strip()]
+
+    current_chunk = ""
+
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) > chunk_size:
+            if current_chunk:
+                chunks.append(current_chunk)
+
+            if current_chunk and chunk_overlap > 0:
+                words = current_chunk.split()
+                overlap_words = words[-int(chunk_overlap / 5):]
+                current_chunk = ' '.join(overlap_words) + ' ' + sentence
+            else:
+                current_chunk = sentence
+        else:
+            current_chunk = current_chunk + "\n" + sentence if current_chunk else sentence
+
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks
+
+
+def assert_same_chunks(text, chunk_size=250, chunk_overlap=80):
+    # Los fragmentos conservan los espacios originales del solapamiento: se comparan las palabras
+    expected = [chunk.split() for chunk in legacy_split_text_into_chunks(text, chunk_size, chunk_overlap)]
+    assert [chunk.split() for chunk in split_text_into_chunks(text, chunk_size, chunk_overlap)] == expected
+
+
+@pytest.fixture(scope="module")
+def catalog_pages():
+    pytest.importorskip("PyPDF2")
+    if not os.path.exists(CATALOG_PDF):
+        pytest.skip("catalogo_.pdf no disponible")
+    pages, _ = extract_pages_from_pdf(CATALOG_PDF, workers=1)
+    assert pages
+    return pages
+
+
+def test_catalog_matches_legacy_chunks(catalog_pages):
+    # El texto completo (como lo fragmentaba main.py) y cada página (como lo hace CatalogIndex)
+    assert_same_chunks("".join(f"{page_text}\n" for page_text in catalog_pages))
+    for page_text in catalog_pages:
+        assert_same_chunks(page_text)
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(250, 80), (120, 40), (500, 100), (250, 0)])
+def test_random_texts_match_legacy_chunks(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size + chunk_overlap)
+    words = ['Laptop', 'Lenovo', 'S/', '1500', 'ThinkPad', 'RAM', '16GB', 'pantalla', '14"', 'garantía', 'x' * 40]
+    spaces = [' ', ' ', ' ', '  ', '\t', ' \t ']
+    for _ in range(500):
+        lines = []
+        for _ in range(rng.randint(0, 30)):
+            line = ''.join(rng.choice(words) + rng.choice(spaces) for _ in range(rng.randint(0, 15)))
+            lines.append(rng.choice(['', ' ', '  ']) + line)
+        assert_same_chunks('\n'.join(lines), chunk_size, chunk_overlap)
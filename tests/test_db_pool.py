@@ -0,0 +1,130 @@
+# File: tests/test_db_pool.py
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+import db_pool as db_pool_module
+from db_pool import ConnectionPool, PoolTimeoutError
+from psycopg2 import extensions
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+        self.rollbacks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+
+class FakeThreadedPool:
+    def __init__(self, minconn, maxconn, **settings):
+        self.free = []
+        self.used = set()
+        self.opened = 0
+        self.closed = []
+
+    def getconn(self):
+        conn = self.free.pop() if self.free else FakeConnection(self.opened)
+        if conn.number == self.opened:
+            self.opened += 1
+        self.used.add(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        self.used.remove(conn)
+        if close:
+            conn.closed = True
+            self.closed.append(conn)
+        else:
+            self.free.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@pytest.fixture
+def connection_pool(monkeypatch):
+    monkeypatch.setattr(db_pool_module.pool, 'ThreadedConnectionPool', FakeThreadedPool)
+    return ConnectionPool(minconn=0, maxconn=2, timeout=0.05, healthcheck_interval=60, settings={})
+
+
+def test_connection_is_returned_after_the_block(connection_pool):
+    with connection_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+    fake_pool = connection_pool._pool
+    assert not fake_pool.used and fake_pool.free == [conn]
+    # La transacción abierta se revierte al devolver la conexión
+    assert conn.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE
+    assert connection_pool.stats()["checkouts"] == 1
+
+
+def test_connection_is_returned_when_the_block_raises(connection_pool):
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            with connection_pool.connection():
+                raise ValueError("consulta inválida")
+    fake_pool = connection_pool._pool
+    assert not fake_pool.used and len(fake_pool.free) == 1 and not fake_pool.closed
+    # Los dos huecos del pool siguen libres
+    with connection_pool.connection(), connection_pool.connection():
+        pass
+
+
+def test_broken_connection_is_closed_instead_of_reused(connection_pool):
+    with pytest.raises(psycopg2.OperationalError):
+        with connection_pool.connection() as conn:
+            raise psycopg2.OperationalError("server closed the connection")
+    fake_pool = connection_pool._pool
+    assert fake_pool.closed == [conn] and not fake_pool.free and not fake_pool.used
+    with connection_pool.connection() as other:
+        assert other is not conn
+
+
+def test_waits_are_bounded_when_exhausted(connection_pool):
+    with connection_pool.connection(), connection_pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with connection_pool.connection():
+                pass
+    assert connection_pool.stats()["timeouts"] == 1
+    with connection_pool.connection():
+        pass
+
+
+def test_idle_broken_connection_is_replaced_on_checkout(connection_pool):
+    with connection_pool.connection() as conn:
+        pass
+    conn.broken = True
+    # Sin uso reciente la conexión se comprueba con SELECT 1 antes de prestarla
+    connection_pool._last_used.clear()
+    with connection_pool.connection() as other:
+        assert other is not conn
+    assert connection_pool.stats()["reconnects"] == 1
+    assert connection_pool._pool.closed == [conn]
@@ -0,0 +1,164 @@
+# File: tests/test_gemini_client.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gemini_client import GeminiClient, GeminiError, LatencyHistogram, SectionSplitter
+
+
+class FakeGemini(BaseHTTPRequestHandler):
+    """Servidor local que responde a cada petición con la siguiente respuesta de la lista"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, headers, body = self.server.responses.pop(0)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGemini)
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **options):
+    options.setdefault('backoff_base', 0.01)
+    return GeminiClient(api_key='clave-de-prueba', base_url=f'http://127.0.0.1:{server.server_port}/v1beta', **options)
+
+
+def answer(text):
+    return json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode()
+
+
+def test_retries_503_and_records_one_latency(server):
+    server.responses = [(503, {}, b'{"error": "ocupado"}'), (503, {'Retry-After': '0.01'}, b'{}'), (200, {}, answer("hola"))]
+    client = make_client(server)
+
+    response = client.generate_content({"contents": []})
+
+    assert response["candidates"][0]["content"]["parts"][0]["text"] == "hola"
+    assert len(server.requests) == 3
+    assert all(headers.get('x-goog-api-key') == 'clave-de-prueba' for _, headers in server.requests)
+    assert 'key=' not in server.requests[0][0]
+    stats = client.stats()
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (1, 2, 0)
+    # Una llamada con sus reintentos cuenta una sola vez en el histograma
+    assert stats["latency"]["generateContent"]["count"] == 1
+
+
+def test_gives_up_after_max_retries(server):
+    server.responses = [(503, {}, b'{"error": "ocupado"}')] * 3
+    client = make_client(server, max_retries=2)
+
+    with pytest.raises(GeminiError) as error:
+        client.generate_content({})
+
+    assert error.value.status_code == 503
+    assert len(server.requests) == 3
+    assert client.stats()["failures"] == 1
+
+
+def test_client_errors_are_not_retried(server):
+    server.responses = [(400, {}, b'{"error": "mal formada"}')]
+    client = make_client(server)
+
+    with pytest.raises(GeminiError) as error:
+        client.generate_content({})
+
+    assert error.value.status_code == 400
+    assert len(server.requests) == 1
+
+
+def test_missing_api_key_fails_before_request(server):
+    client = make_client(server)
+    client.api_key = ''
+
+    with pytest.raises(GeminiError, match='GEMINI_API_KEY'):
+        client.generate_content({})
+    assert server.requests == []
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram(buckets=(100, 500, 1000))
+    for elapsed_ms in (50, 80, 100, 300, 700, 2500):
+        histogram.observe(elapsed_ms)
+
+    stats = histogram.stats()
+    assert stats["count"] == 6
+    assert stats["buckets"] == {'<=100': 3, '<=500': 1, '<=1000': 1, '>1000': 1}
+    assert stats["p50_ms"] == 100
+    assert stats["p95_ms"] == 2500
+    assert stats["max_ms"] == 2500
+
+
+def sse(*events):
+    return b''.join(b'data: ' + json.dumps(event).encode() + b'\r\n\r\n' for event in events)
+
+
+def test_stream_parses_sse_events(server):
+    body = b': comentario\r\n\r\n' + sse(
+        {"candidates": [{"content": {"parts": [{"text": "Laptop "}]}}]},
+        {"candidates": [{"content": {"role": "model"}}]},
+        {"candidates": [{"content": {"parts": [{"text": "Lenovo "}, {"text": "a S/ 1500 ñ"}]}}]},
+    )
+    server.responses = [(200, {'Content-Type': 'text/event-stream'}, body)]
+    client = make_client(server)
+
+    fragments = list(client.stream_generate_content({"contents": []}))
+
+    assert fragments == ["Laptop ", "Lenovo a S/ 1500 ñ"]
+    assert server.requests[0][0].endswith(':streamGenerateContent?alt=sse')
+    latency = client.stats()["latency"]
+    assert latency["streamGenerateContent"]["count"] == 1
+    assert latency["streamGenerateContent:primer_texto"]["count"] == 1
+
+
+def test_stream_rejects_invalid_events(server):
+    server.responses = [(200, {'Content-Type': 'text/event-stream'}, b'data: {no es json\r\n\r\n')]
+    client = make_client(server)
+
+    with pytest.raises(GeminiError, match='SSE'):
+        list(client.stream_generate_content({}))
+
+
+def test_section_splitter_waits_for_complete_sections():
+    splitter = SectionSplitter(first_min_chars=20, min_chars=40)
+    sent = []
+    for fragment in ["*Laptops dispon", "ibles*\n", "\nLa Lenovo X1 cuesta S/ 1500.\n- Pantalla 14\"", "\n- 16 GB", "\n\nStock: 3"]:
+        sent.extend(splitter.feed(fragment))
+    sent.extend(splitter.finish())
+
+    assert sent == [
+        "*Laptops disponibles*\n\nLa Lenovo X1 cuesta S/ 1500.",
+        "- Pantalla 14\"\n- 16 GB\n\nStock: 3",
+    ]
+    assert splitter.sections == 2
+    assert splitter.text.endswith("Stock: 3")
+
+
+def test_section_splitter_boundaries():
+    splitter = SectionSplitter(first_min_chars=1, min_chars=1)
+    sent = []
+    for fragment in ["Uno\n", "\nDos\n", "• tres\n", "🔹 cuatro\n", "1. cinco\n", "seis\n", "2. siete"]:
+        sent.extend(splitter.feed(fragment))
+    sent.extend(splitter.finish())
+    # Las líneas en blanco y las viñetas o números de lista cortan; una línea normal no
+    assert sent == ["Uno", "Dos", "• tres", "🔹 cuatro", "1. cinco\nseis", "2. siete"]
@@ -0,0 +1,11 @@
+# File: tests/test_intent_parser.py
+import pytest
+
+from benchmark_intent_parser import QUERIES, legacy_classify_message, legacy_parse_product_query
+from intent_parser import classify_message, parse_product_query
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_matches_legacy_parser(query):
+    assert parse_product_query(query) == legacy_parse_product_query(query)
+    assert classify_message(query) == legacy_classify_message(query)
@@ -0,0 +1,47 @@
+# File: tests/test_pdf_extraction.py
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from catalog_index import extract_pages_from_pdf
+
+CATALOG_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'catalogo_.pdf')
+
+
+@pytest.fixture(scope="module")
+def sequential_pages():
+    if not os.path.exists(CATALOG_PDF):
+        pytest.skip("catalogo_.pdf no disponible")
+    pages, timings = extract_pages_from_pdf(CATALOG_PDF, workers=1)
+    assert pages and len(timings) == len(pages)
+    return pages
+
+
+@pytest.mark.parametrize("pages_per_task", [None, 1])
+def test_parallel_extraction_matches_sequential(sequential_pages, pages_per_task):
+    pages, timings = extract_pages_from_pdf(CATALOG_PDF, workers=2, pages_per_task=pages_per_task)
+    assert pages == sequential_pages
+    assert len(timings) == len(pages)
+
+
+def test_selected_pages_in_page_order(sequential_pages):
+    wanted = [len(sequential_pages) - 1, 0]
+    pages, _ = extract_pages_from_pdf(CATALOG_PDF, workers=2, page_numbers=wanted)
+    assert pages == [sequential_pages[0], sequential_pages[-1]]
+
+
+def test_parallel_extraction_from_worker_thread(sequential_pages):
+    # Como una reconstrucción lanzada desde un hilo de retrieval_fanout
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(pages=extract_pages_from_pdf(CATALOG_PDF, workers=2)[0]))
+    thread.start()
+    thread.join(timeout=120)
+    assert not thread.is_alive()
+    assert result["pages"] == sequential_pages
+
+
+def test_missing_file_returns_none(tmp_path):
+    assert extract_pages_from_pdf(str(tmp_path / "no_existe.pdf"), workers=2) == (None, None)
@@ -0,0 +1,59 @@
+# File: tests/test_prepared_shapes.py
+"""
+Las consultas de productos se preparan en el servidor (PREPARE ... AS ... $1), donde los
+parámetros no llevan tipo: PostgreSQL tiene que deducirlo del contexto, y en un contexto
+ambiguo como unnest($1) la preparación falla. Se comprueba que los parámetros array
+llevan siempre una conversión explícita y, si hay una base de datos disponible, que cada
+forma de consulta de cada backend se puede preparar.
+"""
+import re
+
+import pytest
+
+from prepared_statements import QueryShape
+from product_search import SEARCH_BACKENDS, PRODUCT_PAGE_SIZE, build_tiered_query, parse_product_query
+
+QUERIES = [
+    "laptop lenovo thinkpad",
+    "laptop de 1500 soles",
+    "monitor samsung 24 pulgadas",
+    "impresora epson menos de 800",
+    "mouse",
+    "entre 100 y 300",
+    "teclado más de 200",
+]
+
+
+def query_shapes(backend):
+    for query in QUERIES:
+        for limit in (None, PRODUCT_PAGE_SIZE):
+            sql, params = build_tiered_query(parse_product_query(query), backend, limit)
+            yield query, QueryShape('productos_test', sql), params
+
+
+@pytest.mark.parametrize("backend", sorted(SEARCH_BACKENDS))
+def test_array_parameters_are_cast(backend):
+    for query, shape, params in query_shapes(backend):
+        for position, name in enumerate(shape.param_names, 1):
+            if not isinstance(params[name], list):
+                continue
+            uses = re.findall(r'\$%d\b(::text\[\])?' % position, shape.prepare_sql)
+            assert uses, (query, name)
+            assert all(uses), f"{backend}: {name} sin ::text[] en la consulta de {query!r}"
+
+
+@pytest.mark.parametrize("backend", sorted(SEARCH_BACKENDS))
+def test_shapes_prepare_on_server(pg_connection, backend):
+    from psycopg2 import errors
+
+    try:
+        with pg_connection.cursor() as cur:
+            for query, shape, _ in query_shapes(backend):
+                cur.execute(shape.prepare_sql)
+                cur.execute(f'DEALLOCATE {shape.name}')
+    except (errors.UndefinedColumn, errors.UndefinedFunction) as e:
+        if backend == 'like':
+            raise
+        pytest.skip(f"Backend {backend} sin preparar (db_bootstrap.py {backend}): {e}")
+    finally:
+        pg_connection.rollback()
@@ -0,0 +1,92 @@
+# File: tests/test_prepared_statements.py
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from psycopg2 import errors
+
+from prepared_statements import QueryShape, StatementRegistry
+
+
+def test_query_shape_numbers_each_parameter_once():
+    shape = QueryShape('productos_q1', "SELECT * FROM productos WHERE precio >= %(min)s AND nombre <%% %(palabra)s "
+                                       "AND (precio <= %(max)s OR precio >= %(min)s)")
+    assert shape.param_names == ['min', 'palabra', 'max']
+    assert shape.prepare_sql == ('PREPARE productos_q1 AS SELECT * FROM productos WHERE precio >= $1 AND nombre <% $2 '
+                                 'AND (precio <= $3 OR precio >= $1)')
+    assert shape.execute_sql == 'EXECUTE productos_q1 (%s, %s, %s)'
+    assert shape.args({'max': 900, 'min': 100, 'palabra': 'lapto'}) == [100, 'lapto', 900]
+
+    assert QueryShape('productos_q2', 'SELECT 1').execute_sql == 'EXECUTE productos_q2'
+
+
+class FakeConnection:
+    def __init__(self, pid=1):
+        self.pid = pid
+        self.prepared = set()
+        self.rollbacks = 0
+
+    def get_backend_pid(self):
+        return self.pid
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith('PREPARE '):
+            self.connection.prepared.add(sql.split()[1])
+        elif sql.startswith('EXECUTE ') and sql.split()[1] not in self.connection.prepared:
+            raise errors.InvalidSqlStatementName(f'prepared statement "{sql.split()[1]}" does not exist')
+
+
+SQL = 'SELECT * FROM productos WHERE precio <= %(max)s'
+
+
+def test_each_shape_is_prepared_once_per_connection():
+    registry = StatementRegistry(enabled=True)
+    conn = FakeConnection()
+    for _ in range(3):
+        registry.execute(FakeCursor(conn), SQL, {'max': 900})
+    assert registry.stats() == {"shapes": 1, "prepares": 1, "executions": 3, "unprepared": 0}
+
+    # Otra conexión, o la misma reemplazada por otro backend, prepara de nuevo
+    registry.execute(FakeCursor(FakeConnection()), SQL, {'max': 900})
+    conn.pid = 2
+    conn.prepared.clear()
+    registry.execute(FakeCursor(conn), SQL, {'max': 900})
+    assert registry.prepares == 3
+
+
+def test_lost_statements_are_prepared_again():
+    registry = StatementRegistry(enabled=True)
+    conn = FakeConnection()
+    registry.execute(FakeCursor(conn), SQL, {'max': 900})
+    # DISCARD ALL o un pooler externo borran las sentencias sin que el registro lo sepa
+    conn.prepared.clear()
+
+    cursor = FakeCursor(conn)
+    setup = [("SELECT set_config('x.y', %s, true)", ['1'])]
+    registry.execute(cursor, SQL, {'max': 900}, setup)
+    assert conn.rollbacks == 1
+    # Tras el rollback se repiten las sentencias previas antes de preparar y ejecutar
+    assert [sql.split()[0] for sql in cursor.statements] == ['SELECT', 'EXECUTE', 'SELECT', 'PREPARE', 'EXECUTE']
+
+
+def test_shapes_beyond_the_limit_run_unprepared():
+    registry = StatementRegistry(max_shapes=1, enabled=True)
+    cursor = FakeCursor(FakeConnection())
+    registry.execute(cursor, SQL, {'max': 900})
+    registry.execute(cursor, 'SELECT * FROM productos WHERE precio >= %(min)s', {'min': 100})
+    assert cursor.statements[-1] == 'SELECT * FROM productos WHERE precio >= %(min)s'
+    assert registry.stats()["unprepared"] == 1
+
+    disabled = StatementRegistry(enabled=False)
+    disabled.execute(cursor, SQL, {'max': 900})
+    assert cursor.statements[-1] == SQL and not disabled.shapes
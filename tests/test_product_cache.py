@@ -0,0 +1,103 @@
+# File: tests/test_product_cache.py
+from contextlib import contextmanager
+
+import pytest
+
+import query_cache as query_cache_module
+from product_search import empty_result, intent_key, parse_product_query
+from query_cache import MISSING, QUERY_CACHE_NEGATIVE_TTL, QueryCache
+
+
+def key(query, **kwargs):
+    return intent_key(parse_product_query(query), **kwargs)
+
+
+def test_same_intent_shares_a_key():
+    assert key("laptop lenovo 1500") == key("1500 lenovo laptop")
+    assert key("que laptop lenovo hay de 1500") == key("laptop lenovo 1500")
+
+
+def test_different_searches_get_different_keys():
+    assert key("laptop lenovo 1500") != key("laptop lenovo 1600")
+    assert key("laptop menos de 1500") != key("laptop más de 1500")
+    # Las palabras repetidas suman relevancia en el nivel de precio exacto
+    assert key("laptop laptop lenovo 1500") != key("laptop lenovo 1500")
+    assert key("laptop") != key("laptop", limit=10)
+    assert key("laptop") != key("laptop", offset=5)
+    assert key("laptop", backend='like') != key("laptop", backend='fts')
+
+
+def test_misses_expire_before_hits(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache_module.time, 'monotonic', lambda: now[0])
+    cache = QueryCache(tiers={"products": (8, QUERY_CACHE_NEGATIVE_TTL * 5)})
+
+    cache.set("products", key("laptop"), {"success": True, "products": [], "total": 1})
+    cache.set("products", key("xyz"), {"success": False, "products": [], "total": 0}, ttl=QUERY_CACHE_NEGATIVE_TTL)
+    now[0] += QUERY_CACHE_NEGATIVE_TTL + 1
+    assert cache.get("products", key("xyz")) is MISSING
+    assert cache.get("products", key("laptop")) is not MISSING
+
+
+def test_product_changes_clear_the_products_tier():
+    cache = QueryCache(tiers={"db": (8, 60), "products": (8, 60), "answer": (8, 60), "pdf": (8, 60)})
+    cache.sync_versions(productos_version=(1, 0, 0))
+    cache.set("products", key("laptop"), {"success": True})
+    cache.set("pdf", "laptop", ["fragmento"])
+    cache.sync_versions(productos_version=(2, 0, 0))
+    assert cache.get("products", key("laptop")) is MISSING
+    assert cache.get("pdf", "laptop") == ["fragmento"]
+
+
+@pytest.fixture
+def search_in_database(monkeypatch):
+    """searchInDatabase de main.py con la base de datos sustituida por un contador"""
+    for module in ("pyperclip", "selenium", "requests", "psycopg2"):
+        pytest.importorskip(module)
+    import main
+
+    calls = []
+    results = {}
+
+    @contextmanager
+    def connection():
+        yield FakeConnection()
+
+    class FakeConnection:
+        def cursor(self):
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    def fake_search(cur, intent, limit, offset):
+        calls.append(intent_key(intent, limit=limit, offset=offset))
+        return dict(results.get(tuple(intent["palabras_clave"]), empty_result()))
+
+    monkeypatch.setattr(main, 'query_cache', QueryCache())
+    monkeypatch.setattr(main, 'get_productos_version', lambda: (1, 0, 0))
+    monkeypatch.setattr(main, 'get_product_mirror', lambda: None)
+    monkeypatch.setattr(main.db_pool, 'connection', connection)
+    monkeypatch.setattr(main, 'search_products', fake_search)
+    return main, calls, results
+
+
+def test_search_in_database_reuses_results_by_intent(search_in_database, monkeypatch, capsys):
+    main, calls, results = search_in_database
+    results[('laptop', 'lenovo')] = {"success": True, "products": [{"codigo": "LAP-1"}], "total": 1, "message": ""}
+
+    assert main.searchInDatabase("laptop lenovo")["success"]
+    assert main.searchInDatabase("Lenovo LAPTOP")["products"] == [{"codigo": "LAP-1"}]
+    assert len(calls) == 1
+
+    # Los "no se encontraron productos" también se guardan, con QUERY_CACHE_NEGATIVE_TTL
+    saved = []
+    original_set = main.query_cache.set
+    monkeypatch.setattr(main.query_cache, 'set', lambda tier, key, value, ttl=None: saved.append(ttl) or original_set(tier, key, value, ttl))
+    assert not main.searchInDatabase("xyz")["success"]
+    assert not main.searchInDatabase("xyz")["success"]
+    assert len(calls) == 2 and saved == [QUERY_CACHE_NEGATIVE_TTL]
+    capsys.readouterr()
@@ -0,0 +1,52 @@
+# File: tests/test_product_mirror.py
+"""
+La réplica en memoria debe devolver exactamente lo mismo que la consulta por niveles.
+La consulta del backend 'like' se ejecuta en SQLite (sqlite_productos, conftest.py) sobre
+una tabla productos aleatoria; la réplica se construye con las mismas filas y se comparan
+los resultados de muchas consultas y ventanas.
+"""
+import random
+
+from conftest import PRODUCT_WORDS, SQLiteCursor
+import product_search
+from prepared_statements import statement_registry
+from product_mirror import ProductSnapshot
+from product_search import PRODUCT_COLUMNS, has_search_terms, parse_product_query, search_products
+
+
+def random_queries(count, seed=5):
+    rng = random.Random(seed)
+    for _ in range(count):
+        price = rng.choice(['', str(rng.randint(10, 3000)), f'menos de {rng.randint(10, 600)}',
+                            f'más de {rng.randint(10, 3000)}', 'entre 100 y 900'])
+        yield f'{rng.choice(PRODUCT_WORDS + ["x"])} {rng.choice(PRODUCT_WORDS + ["de", "con", "cámara", "laptop"])} {price}'
+
+
+def test_snapshot_matches_tiered_query(sqlite_productos, monkeypatch, capsys):
+    monkeypatch.setattr(statement_registry, 'enabled', False)
+    columns = ', '.join(PRODUCT_COLUMNS)
+    rows = sqlite_productos.execute(f'SELECT {columns} FROM productos ORDER BY precio ASC NULLS LAST, codigo ASC').fetchall()
+    snapshot = ProductSnapshot(rows)
+
+    compared = 0
+    for query in random_queries(150):
+        intent = parse_product_query(query)
+        if not has_search_terms(intent):
+            continue
+        for limit, offset in ((product_search.PRODUCT_PAGE_SIZE, 0), (3, 2), (None, 0)):
+            expected = search_products(SQLiteCursor(sqlite_productos), intent, 'like', limit, offset)
+            assert snapshot.search(intent, limit, offset) == expected, (query, limit, offset)
+        compared += 1
+    capsys.readouterr()
+    assert compared > 100
+
+
+def test_keyword_rows_match_substring_scan(sqlite_productos):
+    columns = ', '.join(PRODUCT_COLUMNS)
+    snapshot = ProductSnapshot(sqlite_productos.execute(f'SELECT {columns} FROM productos').fetchall())
+    for palabra in ['laptop', 'top', 'ap', 'son', 'ámara', 'cám', 'p00', 'p0', 'x', 'xyz', 'gamerx', 'l']:
+        expected = set()
+        for word, positions in snapshot.postings.items():
+            if palabra in word:
+                expected.update(positions)
+        assert snapshot._keyword_rows([palabra]) == expected, palabra
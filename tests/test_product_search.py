@@ -0,0 +1,118 @@
+# File: tests/test_product_search.py
+import pytest
+
+from prepared_statements import statement_registry
+from product_search import (FTS_CATEGORY_WEIGHT, TRGM_COLUMNS, TRGM_WORD_SIMILARITY_THRESHOLD, _fts_conditions,
+                            _trigram_conditions, build_tiered_query, parse_product_query, search_products)
+
+# "Soporte para monitor" no es de la categoría monitor: con la consulta "monitor 1500" cumple
+# palabras clave y precio ±5% pero no la categoría, así que no entra en el nivel 2 sino en el 3
+PRODUCTOS = [
+    ('SOP-1', 'Soporte para monitor', 'Brazo articulado para monitor', 1680, 4, 'accesorios'),
+    ('MON-1', 'Monitor Samsung 27', 'Pantalla IPS', 3000, 2, 'monitor'),
+    ('LAP-1', 'Laptop Lenovo', 'Incluye monitor externo de regalo', 900, 1, 'laptop'),
+]
+CONSULTAS = ["monitor 1500", "monitor samsung", "laptop con monitor", "monitor menos de 950"]
+
+
+def test_fts_categories_only_search_categoria():
+    params = {}
+    conditions = _fts_conditions(parse_product_query("monitor lenovo"), params)
+    assert len(conditions) == 2
+    assert params['palabras'] == 'monitor:* | lenovo:*'
+    assert params['categorias'] == f'monitor:*{FTS_CATEGORY_WEIGHT}'
+
+
+def best_tiers(cur, backend):
+    tiers = {}
+    for query in CONSULTAS:
+        sql, params = build_tiered_query(parse_product_query(query), backend)
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        tiers[query] = (rows[0][-2], sorted(row[0] for row in rows)) if rows else None
+    return tiers
+
+
+def test_fts_and_like_pick_the_same_tier(pg_connection):
+    from psycopg2 import errors
+    from db_bootstrap import BUSQUEDA_EXPRESSION
+
+    try:
+        with pg_connection.cursor() as cur:
+            # Tabla temporal con el mismo nombre: oculta a productos solo en esta sesión
+            try:
+                cur.execute(f"""
+                    CREATE TEMP TABLE productos (
+                        codigo text, nombre text, descripcion text, precio numeric, stock int,
+                        categoria text, imagen_url text,
+                        busqueda tsvector GENERATED ALWAYS AS ({BUSQUEDA_EXPRESSION}) STORED
+                    )""")
+            except errors.UndefinedFunction as e:
+                pytest.skip(f"Falta f_unaccent (db_bootstrap.py fts): {e}")
+            cur.executemany("INSERT INTO productos VALUES (%s, %s, %s, %s, %s, %s, NULL)", PRODUCTOS)
+            like = best_tiers(cur, 'like')
+            fts = best_tiers(cur, 'fts')
+    finally:
+        pg_connection.rollback()
+
+    assert like["monitor 1500"] == (3, ['LAP-1', 'MON-1', 'SOP-1'])
+    assert fts == like
+
+
+def test_trigram_compares_each_word_with_each_column():
+    params = {}
+    conditions = _trigram_conditions(parse_product_query("lapto lenovo lapto monitor"), params)
+    assert params == {'palabra_0': 'lapto', 'palabra_1': 'lenovo', 'palabra_2': 'monitor', 'categoria_0': 'monitor'}
+    words, categories = conditions
+    # Una comparación por palabra y columna para que cada una pueda usar su índice GIN
+    for position in range(3):
+        for column in TRGM_COLUMNS:
+            assert f'f_unaccent(%(palabra_{position})s) <%% f_unaccent(LOWER({column}))' in words
+    assert categories == '(f_unaccent(%(categoria_0)s) <%% f_unaccent(LOWER(categoria)))'
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+
+def test_trigram_search_sets_threshold_first(monkeypatch, capsys):
+    monkeypatch.setattr(statement_registry, 'enabled', False)
+    cursor = RecordingCursor()
+    search_products(cursor, parse_product_query("lapto lenovo"), 'trigram')
+    capsys.readouterr()
+
+    (setup_sql, setup_params), (sql, params) = cursor.statements
+    # set_config(..., true) solo dura la transacción de la búsqueda
+    assert setup_sql == "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)"
+    assert setup_params == [str(TRGM_WORD_SIMILARITY_THRESHOLD)]
+    assert 'AS relevancia' in sql and 'ORDER BY relevancia DESC' in sql
+    assert params['relevancia'] == 'lapto lenovo'
+
+
+def test_trigram_tolerates_typos(pg_connection):
+    from psycopg2 import errors
+
+    try:
+        with pg_connection.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE productos (codigo text, nombre text, descripcion text, precio numeric, "
+                        "stock int, categoria text, imagen_url text)")
+            cur.executemany("INSERT INTO productos VALUES (%s, %s, %s, %s, %s, %s, NULL)", PRODUCTOS)
+            try:
+                cur.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                            [str(TRGM_WORD_SIMILARITY_THRESHOLD)])
+                sql, params = build_tiered_query(parse_product_query("lapto lenobo"), 'trigram')
+                cur.execute(sql, params)
+            except (errors.UndefinedFunction, errors.UndefinedObject) as e:
+                pytest.skip(f"Falta pg_trgm o f_unaccent (db_bootstrap.py trigram): {e}")
+            rows = cur.fetchall()
+    finally:
+        pg_connection.rollback()
+
+    assert [row[0] for row in rows] == ['LAP-1']
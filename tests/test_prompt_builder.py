@@ -0,0 +1,101 @@
+# File: tests/test_prompt_builder.py
+import pytest
+
+from catalog_index import CHARS_PER_TOKEN, split_text_into_chunks
+from prompt_builder import (PROMPT_MIN_TRUNCATED_TOKENS, SYSTEM_INSTRUCTION, assemble_context, build_gemini_request,
+                            estimate_tokens, format_product)
+
+PRODUCTS = [
+    {"codigo": f"LAP-{number}", "nombre": f"Laptop Lenovo ThinkPad {number}", "descripcion": "Core i5, 8GB RAM, 256GB SSD " * 20,
+     "precio": 1500 + number, "stock": number, "categoria": "laptop"}
+    for number in range(8)
+]
+
+NO_PDF = {"success": False, "chunks": []}
+NO_DB = {"success": False, "products": []}
+
+
+def db(products, total=None):
+    return {"success": True, "products": products, "total": len(products) if total is None else total}
+
+
+def pdf(chunks, scores=None):
+    results = {"success": True, "chunks": chunks}
+    if scores is not None:
+        results["scores"] = scores
+    return results
+
+
+def test_products_come_first_and_fit_the_budget():
+    budget = 3 * estimate_tokens(format_product(1, PRODUCTS[0])) + 10
+    context = assemble_context(db(PRODUCTS[:5], total=12), pdf(["Garantía de 12 meses en todos los equipos."]), budget)
+    assert [product["codigo"] for product in context["products"]] == ["LAP-0", "LAP-1", "LAP-2"]
+    assert context["tokens"] <= budget
+    assert "(Y 9 productos más encontrados)" in context["db_context"]
+    # Con el presupuesto agotado por los productos no entra ningún fragmento
+    assert context["pdf_context"] == "" and context["dropped_chunks"] == 1
+
+
+def test_first_product_is_kept_even_over_budget():
+    context = assemble_context(db(PRODUCTS[:2]), NO_PDF, budget=5)
+    assert [product["codigo"] for product in context["products"]] == ["LAP-0"]
+
+
+def test_long_descriptions_are_truncated():
+    block = format_product(1, PRODUCTS[0])
+    assert len(block) < len(PRODUCTS[0]["descripcion"]) and "…" in block
+
+
+def test_low_scored_chunks_are_dropped():
+    chunks = ["Laptop Lenovo ThinkPad con garantía", "Monitor Samsung de 24 pulgadas", "Mouse inalámbrico"]
+    context = assemble_context(NO_DB, pdf(chunks, [10.0, 1.0, 0.0]), budget=1000)
+    assert context["pdf_context"].endswith(chunks[0])
+    assert context["dropped_chunks"] == 2
+
+
+def test_overlapping_catalog_chunks_are_not_repeated():
+    text = '\n'.join(f"Producto {number}: laptop modelo {number} con procesador core i{number % 9} y precio {1000 + number}"
+                    for number in range(30))
+    chunks = split_text_into_chunks(text, chunk_size=200, chunk_overlap=60)
+    assert len(chunks) > 3
+    context = assemble_context(NO_DB, pdf(chunks[:3]), budget=10000)
+    pdf_text = context["pdf_context"]
+    for number in range(30):
+        sentence = f"Producto {number}: laptop modelo {number} "
+        assert pdf_text.count(sentence) <= 1, number
+
+
+def test_lines_repeating_database_data_are_removed():
+    product = PRODUCTS[0]
+    chunk = f"Nombre: {product['nombre']}\nGarantía extendida de 24 meses disponible"
+    context = assemble_context(db([product]), pdf([chunk]), budget=10000)
+    assert f"Nombre: {product['nombre']}" not in context["pdf_context"]
+    assert "Garantía extendida de 24 meses disponible" in context["pdf_context"]
+
+
+def test_last_chunk_is_truncated_to_the_remaining_budget():
+    chunks = ["palabra " * 100, "otra " * 400, "final " * 50]
+    budget = estimate_tokens(chunks[0].strip()) + PROMPT_MIN_TRUNCATED_TOKENS + 5
+    context = assemble_context(NO_DB, pdf(chunks), budget)
+    assert context["tokens"] <= budget
+    included = context["pdf_context"].split("\n\n")
+    assert included[-1].endswith("…") and "final" not in context["pdf_context"]
+    assert len(included[-1]) <= (PROMPT_MIN_TRUNCATED_TOKENS + 5) * CHARS_PER_TOKEN
+    assert context["dropped_chunks"] == 1
+
+
+@pytest.mark.parametrize("budget", [50, 200, 1200])
+def test_tokens_never_exceed_the_budget_after_the_first_product(budget):
+    chunks = [f"Fragmento {number} " + "detalle técnico " * (number * 7 % 50 + 1) for number in range(10)]
+    context = assemble_context(db(PRODUCTS[:1]), pdf(chunks, [10 - number for number in range(10)]), budget)
+    first_product = estimate_tokens(format_product(1, PRODUCTS[0]))
+    assert context["tokens"] <= max(budget, first_product)
+
+
+def test_system_instruction_is_not_repeated_in_the_prompt():
+    context = assemble_context(db(PRODUCTS[:1]), NO_PDF)
+    request = build_gemini_request("laptop lenovo", context)
+    assert request["systemInstruction"]["parts"][0]["text"] == SYSTEM_INSTRUCTION
+    prompt = request["contents"][0]["parts"][0]["text"]
+    assert '"laptop lenovo"' in prompt and context["db_context"] in prompt
+    assert "### OBJETIVO" not in prompt
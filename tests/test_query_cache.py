@@ -0,0 +1,40 @@
+# File: tests/test_query_cache.py
+import pytest
+
+from query_cache import LRUTTLCache, MISSING, normalize_query
+
+
+def test_word_order_and_filler_share_a_key():
+    assert normalize_query("precio laptop HP") == normalize_query("¿Qué laptop hp? precio")
+    assert normalize_query("Cámara") == normalize_query("camara")
+    assert normalize_query("laptop hp 1500") == normalize_query("1500 laptop hp")
+
+
+@pytest.mark.parametrize("first, second", [
+    ("laptop con mouse", "laptop sin mouse"),
+    ("laptop con mouse sin teclado", "laptop sin mouse con teclado"),
+    ("monitor de menos de 800", "monitor de más de 800"),
+    ("impresora desde 500", "impresora hasta 500"),
+    ("laptop para gaming", "laptop gaming"),
+    ("laptop no gaming", "laptop gaming"),
+    ("monitor 24 pulgadas 500", "monitor 500 pulgadas 24"),
+    ("laptop i7 1500", "laptop 1500 i7"),
+])
+def test_meaning_bearing_words_keep_keys_apart(first, second):
+    assert normalize_query(first) != normalize_query(second)
+
+
+def test_bound_words_stay_with_their_term():
+    assert normalize_query("laptop con mouse") == normalize_query("con el mouse, laptop")
+    assert normalize_query("laptop con mouse") == "con mouse laptop"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
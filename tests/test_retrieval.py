@@ -0,0 +1,244 @@
+# File: tests/test_retrieval.py
+import math
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from retrieval import BM25Index, extract_query_terms, tokenize
+
+CATALOG_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'catalogo_.pdf')
+
+QUERIES = [
+    "laptop lenovo thinkpad",
+    "laptop de 1500 soles",
+    "precio de la dell latitude 3350",
+    "monitor 24 pulgadas",
+    "impresora epson 800",
+    "core i5 8gb ram 256gb ssd",
+    "mouse",
+    "",
+]
+
+WORDS = ['Laptop', 'Lenovo', 'ThinkPad', 'Dell', 'Latitude', 'monitor', 'pulgadas', 'impresora', 'Epson',
+         'core', 'i5', '8GB', 'RAM', 'SSD', 'precio', 'S/', 'garantía', 'mouse', 'teclado', 'de', 'con']
+
+
+def synthetic_chunks(count=300, seed=3):
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) if rng.random() < 0.8 else str(rng.choice([24, 800, 1500, 3350, rng.randint(1, 5000)]))
+                 for _ in range(rng.randint(1, 40))]
+        chunks.append(' '.join(words))
+    return chunks
+
+
+def catalog_chunks():
+    pytest.importorskip("PyPDF2")
+    from catalog_index import extract_text_from_pdf, split_text_into_chunks
+    if not os.path.exists(CATALOG_PDF):
+        pytest.skip("catalogo_.pdf no disponible")
+    return split_text_into_chunks(extract_text_from_pdf(CATALOG_PDF))
+
+
+@pytest.fixture(scope="module", params=["sintético", "catálogo"])
+def chunks(request):
+    return synthetic_chunks() if request.param == "sintético" else catalog_chunks()
+
+
+def naive_bm25(chunks, query, k1=1.5, b=0.75):
+    """BM25 calculado directamente sobre la lista de fragmentos"""
+    documents = [Counter(tokenize(chunk)) for chunk in chunks]
+    avg_length = sum(sum(document.values()) for document in documents) / len(documents) or 1
+    scores = {}
+    for term in set(extract_query_terms(query)):
+        doc_freq = sum(1 for document in documents if term in document)
+        if not doc_freq:
+            continue
+        idf = math.log(1 + (len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+        for doc_id, document in enumerate(documents):
+            if term in document:
+                norm = k1 * (1 - b + b * sum(document.values()) / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * document[term] * (k1 + 1) / (document[term] + norm)
+    return scores
+
+
+def test_bm25_matches_formula(chunks):
+    index = BM25Index.from_chunks(chunks)
+    for query in QUERIES:
+        expected = naive_bm25(chunks, query)
+        assert index.score(query) == pytest.approx(expected)
+        best = sorted(expected.items(), key=lambda item: (-item[1], item[0]))[:5]
+        assert [doc_id for _, doc_id, _ in index.search_with_scores(query)] == [doc_id for doc_id, _ in best]
+
+
+def test_bm25_incremental_changes_match_rebuild():
+    chunks = synthetic_chunks()
+    index = BM25Index.from_chunks(chunks[:200])
+    # Se quitan 50 fragmentos y se añaden los 100 restantes, como al re-indexar páginas
+    index.apply_catalog_changes(list(range(150, 200)), list(enumerate(chunks))[200:])
+    remaining = {doc_id: chunk for doc_id, chunk in enumerate(chunks) if not 150 <= doc_id < 200}
+
+    rebuilt = BM25Index()
+    for doc_id, chunk in remaining.items():
+        rebuilt.add_document(doc_id, chunk)
+    for query in QUERIES:
+        assert index.score(query) == pytest.approx(rebuilt.score(query))
+        assert index.search_with_scores(query) == rebuilt.search_with_scores(query)
+
+
+def test_bm25_reads_texts_from_source():
+    chunks = synthetic_chunks(50)
+    store = dict(enumerate(chunks))
+    index = BM25Index(text_source=store.get)
+    index.apply_catalog_changes([], list(store.items()))
+    assert index.texts == {}
+
+    results = index.search_with_scores("laptop lenovo")
+    assert results and all(text == chunks[doc_id] for _, doc_id, text in results)
+    # Un fragmento borrado del almacén antes de que el índice se actualice se omite
+    del store[results[0][1]]
+    assert results[0][1] not in [doc_id for _, doc_id, _ in index.search_with_scores("laptop lenovo")]
+
+
+def random_queries(count=100, seed=9):
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = [rng.choice(WORDS + ['lap', 'top', 'xyz', str(rng.randint(1, 5000))]) for _ in range(rng.randint(1, 5))]
+        yield ' '.join(words).lower() if rng.random() < 0.5 else ' '.join(words)
+
+
+def test_vectorized_matches_find_relevant_chunks(chunks):
+    pytest.importorskip("numpy")
+    pytest.importorskip("scipy")
+    from retrieval import VectorizedScorer, find_relevant_chunks
+
+    scorer = VectorizedScorer.from_chunks(chunks)
+    for query in QUERIES + list(random_queries()):
+        for max_chunks in (1, 5, 20):
+            expected = find_relevant_chunks(chunks, query, max_chunks)
+            assert [text for _, _, text in scorer.search_with_scores(query, max_chunks)] == expected, (query, max_chunks)
+
+
+def test_heuristic_matches_find_relevant_chunks(chunks):
+    from retrieval import HeuristicIndex, find_relevant_chunks
+
+    index = HeuristicIndex.from_chunks(chunks)
+    for query in QUERIES + list(random_queries()):
+        for max_chunks in (1, 5, 20):
+            expected = find_relevant_chunks(chunks, query, max_chunks)
+            assert [text for _, _, text in index.search_with_scores(query, max_chunks)] == expected, (query, max_chunks)
+
+
+def test_numeric_index_range_lookups():
+    from retrieval import NumericIndex
+
+    index = NumericIndex()
+    index.add_document(1, "laptop 1500 y 1650 soles")
+    index.add_document(2, "monitor 24 pulgadas 1350")
+    index.add_document(3, "1500 1500 1499")
+    index.add_document(4, "sin números")
+
+    assert len(index) == 7
+    # ±10% de 1500 es [1350, 1650], bordes incluidos
+    assert index.count_near(1500) == {1: 2, 2: 1, 3: 3}
+    assert index.count_near(1500, tolerance=0) == {1: 1, 3: 2}
+    assert index.count_near(24) == {2: 1}
+    assert index.count_near(100) == {}
+
+    index.remove_document(3)
+    index.apply_catalog_changes([1], [(5, "oferta 1649")])
+    assert index.count_near(1500) == {2: 1, 5: 1}
+    assert list(index.values) == sorted(index.values)
+
+
+def test_numeric_index_matches_linear_scan():
+    from retrieval import NumericIndex
+
+    rng = random.Random(4)
+    documents = {doc_id: [rng.randint(0, 3000) for _ in range(rng.randint(0, 8))] for doc_id in range(200)}
+    index = NumericIndex()
+    for doc_id, numbers in documents.items():
+        index.add_document(doc_id, ' '.join(map(str, numbers)))
+    for price in [0, 1, 10, 99, 100, 1500, 2999, 3000, 5000] + [rng.randint(1, 3000) for _ in range(100)]:
+        expected = {}
+        for doc_id, numbers in documents.items():
+            hits = sum(1 for number in numbers if abs(number - price) <= price * 0.1)
+            if hits:
+                expected[doc_id] = hits
+        assert index.count_near(price) == expected, price
+
+
+def test_streaming_top_k_matches_full_sort(chunks):
+    from retrieval import HeuristicIndex
+
+    index = HeuristicIndex.from_chunks(chunks)
+    for query in QUERIES + list(random_queries(100)):
+        for max_chunks in (0, 1, 5, 20, len(chunks) + 1):
+            assert (index.search_with_scores(query, max_chunks, streaming=True) ==
+                    index.search_with_scores(query, max_chunks)), (query, max_chunks)
+
+
+def test_streaming_stops_once_top_k_is_positive():
+    from retrieval import HeuristicIndex
+
+    chunks = ["laptop lenovo"] * 3 + ["monitor"] * 1000
+    index = HeuristicIndex.from_chunks(chunks)
+    heap_floor = [None]
+    scored = list(index.iter_scores("laptop", min_score=lambda: heap_floor[0]))
+    assert len(scored) == len(chunks)
+
+    heap_floor[0] = 1.0
+    # Con el k-ésimo mejor ya positivo los fragmentos sin términos (puntuación 0) no se recorren
+    assert [doc_id for _, doc_id in index.iter_scores("laptop", min_score=lambda: heap_floor[0])] == [0, 1, 2]
+
+
+def engine_factories():
+    from retrieval import HeuristicIndex, VectorizedScorer
+    factories = [HeuristicIndex]
+    try:
+        import numpy  # noqa: F401
+        import scipy  # noqa: F401
+        factories.append(VectorizedScorer)
+    except ImportError:
+        pass
+    return factories
+
+
+def test_engines_read_texts_from_source():
+    chunks = synthetic_chunks(50)
+    store = dict(enumerate(chunks))
+    for factory in engine_factories():
+        engine = factory(text_source=store.get)
+        engine.apply_catalog_changes([], list(store.items()))
+        assert engine.texts == {}, factory
+        expected = factory.from_chunks(chunks).search_with_scores("laptop lenovo 1500", 10)
+        assert engine.search_with_scores("laptop lenovo 1500", 10) == expected, factory
+
+
+def test_incremental_updates_match_rebuild():
+    rng = random.Random(5)
+    chunks = synthetic_chunks(120)
+    for factory in engine_factories():
+        current = dict(enumerate(chunks[:80]))
+        engine = factory()
+        engine.apply_catalog_changes([], list(current.items()))
+        next_id = 80
+        for _ in range(5):
+            removed = rng.sample(sorted(current), 10)
+            for doc_id in removed:
+                del current[doc_id]
+            added = [(next_id + i, chunks[rng.randrange(len(chunks))]) for i in range(8)]
+            next_id += len(added)
+            current.update(added)
+            engine.apply_catalog_changes(removed, added)
+
+        assert len(engine) == len(current)
+        ordered = [current[doc_id] for doc_id in sorted(current)]
+        rebuilt = factory.from_chunks(ordered)
+        for query in QUERIES + list(random_queries(30)):
+            got = [(score, text) for score, _, text in engine.search_with_scores(query, 10)]
+            want = [(score, text) for score, _, text in rebuilt.search_with_scores(query, 10)]
+            assert got == want, (factory, query)
@@ -0,0 +1,71 @@
+# File: tests/test_retrieval_fanout.py
+import threading
+import time
+
+from retrieval_fanout import RetrievalFanout
+
+
+def sleeper(seconds, value, finished=None):
+    def function():
+        time.sleep(seconds)
+        if finished is not None:
+            finished.set()
+        return value
+    return function
+
+
+def test_sources_run_concurrently():
+    fanout = RetrievalFanout(max_workers=4)
+    start = time.perf_counter()
+    results, report = fanout.run({
+        "db": (sleeper(0.2, "productos"), 2, None),
+        "pdf": (sleeper(0.2, "fragmentos"), 2, None),
+    })
+    assert time.perf_counter() - start < 0.35
+    assert results == {"db": "productos", "pdf": "fragmentos"}
+    assert {name: entry["status"] for name, entry in report.items()} == {"db": "ok", "pdf": "ok"}
+
+
+def test_slow_source_gives_partial_results():
+    fanout = RetrievalFanout(max_workers=4)
+    finished = threading.Event()
+    start = time.perf_counter()
+    results, report = fanout.run({
+        "db": (sleeper(0.05, "productos"), 2, None),
+        "pdf": (sleeper(0.5, "fragmentos", finished), 0.1, "reserva"),
+    })
+    assert time.perf_counter() - start < 0.3
+    assert results == {"db": "productos", "pdf": "reserva"}
+    assert report["pdf"] == {"status": "timeout", "ms": 100.0}
+    assert report["db"]["status"] == "ok"
+    # La fuente vencida no se interrumpe: termina en segundo plano
+    assert not finished.is_set() and finished.wait(2)
+    assert fanout.stats()["pdf"]["timeouts"] == 1
+
+
+def test_failing_source_uses_its_fallback():
+    fanout = RetrievalFanout(max_workers=4)
+
+    def failing():
+        raise RuntimeError("sin conexión")
+
+    results, report = fanout.run({
+        "db": (failing, 2, {"success": False}),
+        "pdf": (sleeper(0.01, "fragmentos"), 2, None),
+    })
+    assert results == {"db": {"success": False}, "pdf": "fragmentos"}
+    assert report["db"]["status"] == "error" and report["pdf"]["status"] == "ok"
+    assert fanout.stats()["db"]["errors"] == 1
+
+
+def test_deadlines_count_from_the_start():
+    fanout = RetrievalFanout(max_workers=4)
+    start = time.perf_counter()
+    results, report = fanout.run({
+        "db": (sleeper(1, "productos"), 0.2, None),
+        "pdf": (sleeper(1, "fragmentos"), 0.1, None),
+    })
+    # Los plazos no se suman: se espera como mucho el más largo
+    assert time.perf_counter() - start < 0.3
+    assert results == {"db": None, "pdf": None}
+    assert [report[name]["status"] for name in ("db", "pdf")] == ["timeout", "timeout"]
@@ -0,0 +1,95 @@
+# File: tests/test_singleflight.py
+import threading
+import time
+
+from singleflight import SingleFlight
+
+
+def run_together(flights, key, function, callers):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do(key, function))) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight(wait_timeout=5)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "respuesta"
+
+    results = run_together(flights, "laptop", slow, 4)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"respuesta"}
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_key_is_released_before_followers_wake():
+    flights = SingleFlight(wait_timeout=5)
+    retried = []
+
+    def slow():
+        time.sleep(0.2)
+        return "cortada"
+
+    def follower():
+        result, shared = flights.do("laptop", slow)
+        if shared:
+            # Un seguidor que reintenta con la misma clave inicia una ejecución nueva
+            retried.append(flights.do("laptop", lambda: "nueva"))
+
+    leader = threading.Thread(target=lambda: flights.do("laptop", slow))
+    leader.start()
+    time.sleep(0.05)
+    follower()
+    leader.join()
+    assert retried == [("nueva", False)]
+
+
+def test_exceptions_reach_followers():
+    flights = SingleFlight(wait_timeout=5)
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("sin conexión")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("laptop", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["sin conexión"] * 3
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_follower_timeout_runs_outside_the_flight():
+    flights = SingleFlight(wait_timeout=0.05)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.3)
+        return "respuesta"
+
+    results = run_together(flights, "laptop", slow, 3)
+    # Cada seguidor que agota el plazo repite el trabajo por su cuenta
+    assert len(calls) == 3
+    assert [shared for _, shared in results] == [False, False, False]
+    stats = flights.stats()
+    assert stats["wait_timeouts"] == 2 and stats["executions"] == 3 and stats["shared"] == 0
@@ -0,0 +1,128 @@
+# File: tests/test_tiered_query.py
+"""
+La consulta única por niveles debe devolver lo mismo que ejecutar los niveles uno tras
+otro. La referencia evalúa en Python cada nivel por separado sobre las filas de la tabla
+(sqlite_productos, conftest.py) y se queda con el primero que tiene productos.
+"""
+import random
+
+from conftest import PRODUCT_WORDS, SQLiteCursor
+from prepared_statements import statement_registry
+from product_search import (PRODUCT_COLUMNS, PRODUCT_PAGE_SIZE, TIER_EXACT_PRICE, TIER_ALL_TERMS, TIER_ANY_TERM, TIER_WIDE_PRICE,
+                            has_search_terms, keyword_score, make_result, needs_keyword_ranking, parse_product_query,
+                            price_bounds, search_products)
+
+PRECIO = PRODUCT_COLUMNS.index('precio')
+CODIGO = PRODUCT_COLUMNS.index('codigo')
+CATEGORIA = PRODUCT_COLUMNS.index('categoria')
+TEXT_COLUMNS = [PRODUCT_COLUMNS.index(column) for column in ('codigo', 'nombre', 'descripcion', 'categoria')]
+
+
+def in_range(row, low, high):
+    precio = row[PRECIO]
+    return precio is not None and (low is None or precio >= low) and (high is None or precio <= high)
+
+
+def sequential_tiers(intent):
+    """(nivel, condición) de cada nivel en orden, como los pasos de la búsqueda original"""
+    min_precio, max_precio = intent["min_precio"], intent["max_precio"]
+    has_price = min_precio is not None or max_precio is not None
+
+    conditions = []
+    if intent["palabras_clave"]:
+        conditions.append(lambda row: any(palabra in str(row[column] or '').lower()
+                                          for palabra in intent["palabras_clave"] for column in TEXT_COLUMNS))
+    if intent["categorias"]:
+        conditions.append(lambda row: any(categoria in str(row[CATEGORIA] or '').lower() for categoria in intent["categorias"]))
+    low, high = price_bounds(min_precio, max_precio, 0.05)
+    if low is not None:
+        conditions.append(lambda row: in_range(row, low, None))
+    if high is not None:
+        conditions.append(lambda row: in_range(row, None, high))
+
+    tiers = []
+    if has_price:
+        tiers.append((TIER_EXACT_PRICE, lambda row: in_range(row, *price_bounds(min_precio, max_precio, 0))))
+    if conditions:
+        tiers.append((TIER_ALL_TERMS, lambda row: all(condition(row) for condition in conditions)))
+        if len(conditions) > 1:
+            tiers.append((TIER_ANY_TERM, lambda row: any(condition(row) for condition in conditions)))
+    if has_price:
+        tiers.append((TIER_WIDE_PRICE, lambda row: in_range(row, *price_bounds(min_precio, max_precio, 0.15))))
+    return tiers
+
+
+def sequential_search(rows, intent):
+    """(nivel, filas ordenadas) del primer nivel con productos, o None"""
+    for tier, condition in sequential_tiers(intent):
+        matches = sorted((row for row in rows if condition(row)),
+                         key=lambda row: (row[PRECIO] is None, row[PRECIO] or 0, row[CODIGO]))
+        if tier == TIER_EXACT_PRICE and needs_keyword_ranking(intent):
+            matches.sort(key=lambda row: keyword_score(row, intent), reverse=True)
+        if matches:
+            return tier, matches
+    return None
+
+
+def random_queries(count, seed=8):
+    rng = random.Random(seed)
+    for _ in range(count):
+        price = rng.choice(['', str(rng.randint(10, 3000)), f'menos de {rng.randint(10, 600)}',
+                            f'más de {rng.randint(10, 3000)}', f'entre {rng.randint(10, 900)} y {rng.randint(900, 3000)}'])
+        words = rng.sample(PRODUCT_WORDS + ['xyz', 'celular', 'digital', 'top'], rng.randint(0, 3))
+        yield ' '.join(words + [price])
+
+
+def product_rows(db):
+    return db.execute(f'SELECT {", ".join(PRODUCT_COLUMNS)} FROM productos').fetchall()
+
+
+def test_single_query_matches_sequential_tiers(sqlite_productos, monkeypatch, capsys):
+    monkeypatch.setattr(statement_registry, 'enabled', False)
+    rows = product_rows(sqlite_productos)
+
+    # Solo el nivel de ±15% alcanza el precio más bajo de la tabla
+    cheapest = min(row[PRECIO] for row in rows if row[PRECIO] is not None)
+    queries = list(random_queries(200)) + [f'menos de {cheapest * 100 // 110}']
+
+    tiers_seen = set()
+    for query in queries:
+        intent = parse_product_query(query)
+        if not has_search_terms(intent):
+            continue
+        expected = sequential_search(rows, intent)
+        result = search_products(SQLiteCursor(sqlite_productos), intent, 'like', limit=None)
+        if expected is None:
+            assert not result["success"], query
+            continue
+        tier, matches = expected
+        tiers_seen.add(tier)
+        assert result == make_result(tier, matches, len(matches)), query
+    capsys.readouterr()
+    assert tiers_seen == {TIER_EXACT_PRICE, TIER_ALL_TERMS, TIER_ANY_TERM, TIER_WIDE_PRICE}
+
+
+class CountingCursor(SQLiteCursor):
+    def fetchall(self):
+        self.fetched = len(self.rows)
+        return self.rows
+
+
+def test_window_is_bounded_and_keeps_the_total(sqlite_productos, monkeypatch, capsys):
+    monkeypatch.setattr(statement_registry, 'enabled', False)
+
+    for query in ['laptop lenovo', 'monitor 1500', 'menos de 900', 'mouse gamer más de 200']:
+        intent = parse_product_query(query)
+        full = search_products(SQLiteCursor(sqlite_productos), intent, 'like', limit=None)
+        assert full["success"] and full["total"] > 10, query
+        for limit, offset in ((PRODUCT_PAGE_SIZE, 0), (3, 4), (10, full["total"] - 2)):
+            cursor = CountingCursor(sqlite_productos)
+            result = search_products(cursor, intent, 'like', limit, offset)
+            # Solo se traen las filas de la ventana, pero el total es el del nivel completo
+            assert cursor.fetched <= limit, (query, limit, offset)
+            assert result["products"] == full["products"][offset:offset + limit], (query, limit, offset)
+            assert result["total"] == full["total"] and result["message"] == full["message"]
+
+        beyond = search_products(SQLiteCursor(sqlite_productos), intent, 'like', PRODUCT_PAGE_SIZE, full["total"])
+        assert not beyond["success"] and beyond["products"] == []
+    capsys.readouterr()